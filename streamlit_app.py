@@ -6,6 +6,7 @@ import re
 import shutil
 from pathlib import Path
 from datetime import datetime
+from functools import lru_cache
 import threading
 from whatsapp_bot import WhatsAppBot
 from clean_order_csv import clean_phone_number, clean_name, convert_arabic_numerals
@@ -172,12 +173,20 @@ def format_phone_number(phone, country_code="+966"):
     """Format phone number with country code using advanced cleaning"""
     return clean_phone_number(phone, country_code)
 
+_TEMPLATE_VARIABLE_RE = re.compile(r"\{(name|phone|custom_message)\}")
+
+@lru_cache(maxsize=32)
+def _compile_message_template(template):
+    """Split a message template into literal text and variable names (odd positions)"""
+    return tuple(_TEMPLATE_VARIABLE_RE.split(template))
+
 def parse_message_template(template, name="", phone="", custom_message=""):
     """Replace variables in message template"""
-    message = template.replace("{name}", str(name))
-    message = message.replace("{phone}", str(phone))
-    message = message.replace("{custom_message}", str(custom_message))
-    return message
+    # The template is parsed once per bulk send, not once per contact
+    values = {"name": str(name), "phone": str(phone), "custom_message": str(custom_message)}
+    parts = list(_compile_message_template(template))
+    parts[1::2] = [values[variable] for variable in parts[1::2]]
+    return "".join(parts)
 
 # Main UI
 st.markdown('<div class="main-header">📱 WhatsApp Bulk Messaging Bot</div>', unsafe_allow_html=True)
@@ -1439,9 +1448,11 @@ with tab4:
                     st.markdown(f"**Conversation Summary:** {selected_lead['conversation_summary']}")
 
                     # Show full conversation history if available
-                    if selected_lead_phone in st.session_state.bot.conversations:
+                    # Snapshot the history - monitoring threads append to it while
+                    # this renders, and .get() doesn't add an empty entry
+                    conversation = list(st.session_state.bot.conversations.get(selected_lead_phone, ()))
+                    if conversation:
                         st.markdown("**Full Conversation:**")
-                        conversation = st.session_state.bot.conversations[selected_lead_phone]
                         for msg in conversation:
                             role = "👤 Customer" if msg['role'] == 'user' else "🤖 AI"
                             st.markdown(f"**{role}:** {msg['content']}")
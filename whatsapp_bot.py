@@ -4,27 +4,616 @@ Modern, simplified implementation with robust error handling
 """
 
 import os
+import platform
 import time
-import random
 import csv
+import json
 import re
 import threading
-from typing import Optional, List, Dict
+import traceback
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Deque, Tuple
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice, repeat
 from pathlib import Path
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import (
+    TimeoutException, NoSuchElementException, StaleElementReferenceException
+)
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 
-from openai import OpenAI
+import httpx
+import urllib3
+from openai import OpenAI, DefaultHttpxClient
 from dotenv import load_dotenv
-from clean_order_csv import convert_arabic_numerals
+from clean_order_csv import ARABIC_NUMERALS
+
+
+# Paste shortcut modifier (Cmd on macOS, Ctrl elsewhere)
+_PASTE_MODIFIER = Keys.COMMAND if platform.system() == 'Darwin' else Keys.CONTROL
+
+_VIDEO_EXTENSIONS = frozenset({'.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.wmv', '.3gp'})
+
+# (minimum size in MB, max seconds to wait) for video uploads, largest first.
+# Kept under Selenium's 30s async script timeout.
+_VIDEO_UPLOAD_WAITS = ((50, 25), (20, 20), (0, 17))
+
+# CSS selectors for WhatsApp Web elements, in priority order
+_INPUT_BOX_SELECTOR = "[contenteditable='true'][data-tab='10']"
+
+# Chat input box once the chat has loaded, 'invalid' once WhatsApp reports that
+# the number isn't on WhatsApp, otherwise null - one query per poll. The report
+# is a modal popup with a button (OK) shown instead of the chat; it is found by
+# that structure, not its text, so it works in any UI language. The "Starting
+# chat" popup shown while a valid chat loads has no button.
+_CHAT_READY_JS = """
+const box = document.querySelector(arguments[0]);
+if (box) {
+    return box;
+}
+for (const popup of document.querySelectorAll("[data-animate-modal-popup], [role='dialog']")) {
+    if (popup.getClientRects().length && popup.querySelector('button, [role="button"]')) {
+        return 'invalid';
+    }
+}
+return null;
+"""
+
+# True if anything matches the selector passed as arguments[0]
+_EXISTS_JS = "return document.querySelector(arguments[0]) !== null;"
+
+# Any of these means an open chat: message panel, a message, the input box
+# or the main conversation panel. A bare [role='application'] is not enough -
+# it is there before the target conversation has rendered.
+_CHAT_LOADED_SELECTOR = (
+    "[data-testid='conversation-panel-body'], "
+    "[data-testid='conversation-panel-messages'], "
+    "[data-testid='msg-container'], "
+    f"{_INPUT_BOX_SELECTOR}, "
+    "div[class*='_ak'][role='application']"
+)
+
+# Length of the text in the chat input. textContent never forces a layout,
+# unlike innerText; only the length is needed for the paste check.
+_INPUT_TEXT_LENGTH_JS = "return (arguments[0].textContent || '').length;"
+
+# Plus icon (new WhatsApp UI), clip icon (older UI) or any "Attach" label.
+# One union selector: the engine returns the first hit in a single pass.
+_ATTACH_SELECTOR = "[data-icon='plus'], [data-icon='clip'], [aria-label*='Attach' i]"
+
+# "Photos & Videos" entry of the attachment menu (icon name varies by UI version)
+_MEDIA_ITEM_SELECTOR = "[data-icon='media-filled-refreshed'], [data-icon='image'], [data-icon='gallery']"
+
+_VIDEO_INPUT_SELECTORS = (
+    "input[type='file'][accept*='video']",  # Video input preferred
+    "input[type='file']:not([accept*='image'])",  # General file input (not image-only)
+    "input[type='file']",  # Last resort: any file input
+)
+_IMAGE_INPUT_SELECTORS = (
+    "input[type='file'][accept*='image']",
+    "input[type='file']",
+)
+
+# Picks the newest enabled file input, trying selectors in priority order.
+# For videos an image-only input is widened to accept videos in place, so
+# the whole search costs one round-trip instead of several per candidate.
+# Returns {el, accept, widened} (widened = original accept if modified) and
+# keeps the input on window.__wtsp.fileInput for _set_input_file().
+_PICK_FILE_INPUT_JS = """
+const selectors = arguments[0];
+const isVideo = arguments[1];
+window.__wtsp = window.__wtsp || {};
+for (const sel of selectors) {
+    const inputs = document.querySelectorAll(sel);
+    for (let i = inputs.length - 1; i >= 0; i--) {
+        const inp = inputs[i];
+        if (inp.disabled) {
+            continue;
+        }
+        window.__wtsp.fileInput = inp;
+        const accept = inp.getAttribute('accept') || '';
+        if (isVideo && accept && !accept.includes('video') && accept.includes('image')) {
+            inp.setAttribute('accept', 'image/*,video/*');
+            return {el: inp, accept: 'image/*,video/*', widened: accept};
+        }
+        return {el: inp, accept: accept, widened: null};
+    }
+}
+return null;
+"""
+
+_SEND_SELECTORS = (
+    "[data-icon='wds-ic-send-filled']",  # New WhatsApp UI
+    "[data-icon='send']",  # Older UI
+    "[aria-label='Send']",
+    "[data-testid='send']",
+)
+
+# Text nodes of incoming messages, used when the detection script finds nothing
+_INCOMING_TEXT_SELECTOR = (
+    "[data-testid='msg-container'] [class*='message-in'] .selectable-text, "
+    "[data-testid='msg-container'] [class*='message-in'] [data-testid='conversation-text'], "
+    "div[class*='message-in'] .selectable-text"
+)
+
+# Collects incoming messages in the open chat whose IDs are not in the seen
+# list passed as arguments[0]. Returns {messages: [{text, timestamp, id}],
+# count: <incoming messages in the chat>}.
+_FIND_INCOMING_JS = r"""
+console.log('Starting message detection...');
+const seen = new Set(arguments[0]);
+
+// Try multiple selectors for message containers
+let messageContainers = document.querySelectorAll('[data-testid="msg-container"]');
+console.log('Method 1 - Found containers with [data-testid="msg-container"]:', messageContainers.length);
+
+// Fallback: try alternative selectors
+if (messageContainers.length === 0) {
+    messageContainers = document.querySelectorAll('div[data-id]');
+    console.log('Method 2 - Found containers with div[data-id]:', messageContainers.length);
+}
+
+// Filter for incoming messages (not sent by us) we haven't seen
+const incomingMessages = [];
+let incomingCount = 0;
+
+for (const container of messageContainers) {
+    // Check if this is an incoming message. The row's data-id starts with
+    // 'false_' for received and 'true_' for sent messages; the substring class
+    // match ('message-in' / 'message-out') is only needed when it's missing
+    const idHolder = container.hasAttribute('data-id') ? container : container.closest('[data-id]');
+    const dataId = idHolder ? idHolder.getAttribute('data-id') : '';
+    const isIncoming = dataId.startsWith('false_') ||
+        (!dataId.startsWith('true_') && container.querySelector('[class*="message-in"]') !== null);
+
+    if (isIncoming) {
+        console.log('Found incoming message element');
+        // Get the text content - try multiple selectors
+        let text = null;
+
+        // Try .selectable-text first
+        const selectableText = container.querySelector('.selectable-text');
+        if (selectableText) {
+            text = selectableText.textContent || selectableText.innerText;
+        }
+
+        // Try conversation-text as fallback
+        if (!text) {
+            const convText = container.querySelector('[data-testid="conversation-text"]');
+            if (convText) {
+                text = convText.textContent || convText.innerText;
+            }
+        }
+
+        // Last resort: the message text span (direction-tagged or inside
+        // .copyable-text) - one lookup instead of walking every span
+        if (!text) {
+            const textSpan = container.querySelector('span[dir="ltr"], span[dir="rtl"], span.copyable-text > span');
+            if (textSpan) {
+                text = textSpan.textContent;
+            }
+        }
+
+        if (text && text.trim()) {
+            // Get timestamp if available
+            let timestamp = null;
+            const timeEl = container.querySelector('[data-testid="msg-meta"]') ||
+                          container.querySelector('span[class*="timestamp"]') ||
+                          container.querySelector('div[data-pre-plain-text]');
+            if (timeEl) {
+                timestamp = timeEl.textContent || timeEl.getAttribute('data-pre-plain-text');
+            }
+
+            // Create unique ID from message content + timestamp
+            const msgId = container.getAttribute('data-id') ||
+                         (text.substring(0, 50) + (timestamp || '')).replace(/\s/g, '');
+
+            incomingCount++;
+            if (!seen.has(msgId)) {
+                incomingMessages.push({
+                    text: text.trim(),
+                    timestamp: timestamp,
+                    id: msgId
+                });
+            }
+        }
+    }
+}
+
+console.log('Incoming messages found:', incomingCount, 'new:', incomingMessages.length);
+
+// Return only the new incoming messages
+return {
+    messages: incomingMessages,
+    count: incomingCount
+};
+"""
+
+# Any chat row in the sidebar - present once the chat list has rendered
+_CHAT_ROW_SELECTOR = '#pane-side [role="listitem"], #pane-side [role="row"]'
+
+# Unread badge of a chat row: the count badge's test id, or an aria-label
+# mentioning "unread" (English UI only - count badges and chats marked unread
+# by hand)
+_UNREAD_BADGE_SELECTOR = '[data-testid="icon-unread-count"], [aria-label*="unread" i]'
+
+# Chats in the sidebar whose title is a phone number, mapped from the number's
+# digits to whether the row shows an unread badge. Chats saved under a name
+# can't be matched to a number and are left out. Besides the selector above,
+# a row counts as unread if it has a span whose text is just a number (Western
+# or Arabic-Indic digits) repeated in its aria-label - the count badge in any
+# UI language. Also returns how many rows showed a badge, and the page's
+# incoming-message count (see __wtspIncomingCount), null if not available.
+_SIDEBAR_UNREAD_JS = r"""
+const badgeSel = arguments[1];
+const hasBadge = (row) => {
+    if (row.querySelector(badgeSel) !== null) {
+        return true;
+    }
+    for (const span of row.querySelectorAll('span[aria-label]')) {
+        const text = span.textContent.trim();
+        if (/^[0-9٠-٩]+$/.test(text) && span.getAttribute('aria-label').includes(text)) {
+            return true;
+        }
+    }
+    return false;
+};
+const unread = {};
+let badges = 0;
+for (const row of document.querySelectorAll(arguments[0])) {
+    const badge = hasBadge(row);
+    badges += badge ? 1 : 0;
+    const titleEl = row.querySelector('span[title]');
+    const digits = titleEl ? titleEl.getAttribute('title').replace(/\D/g, '') : '';
+    if (digits.length < 7) {
+        continue;
+    }
+    unread[digits] = unread[digits] || badge;
+}
+const incoming = window.__wtspIncomingCount ? window.__wtspIncomingCount() : null;
+return {unread: unread, badges: badges, incoming: incoming};
+"""
+
+# [read, delivered] counts over the message bubbles of the open chat, in one
+# round-trip. A read message is not also counted as delivered. One query finds
+# every double check icon; only the bubbles holding one are visited, and each
+# is classified from the icons' aria-labels.
+_READ_RECEIPTS_JS = """
+const container = "[data-testid='msg-container']";
+const isRead = new Map();
+for (const icon of document.querySelectorAll(container + " [data-icon='msg-dblcheck']")) {
+    const msg = icon.closest(container);
+    const read = (icon.getAttribute('aria-label') || '').includes('Read');
+    isRead.set(msg, isRead.get(msg) || read);
+}
+let read = 0;
+for (const value of isRead.values()) {
+    read += value ? 1 : 0;
+}
+return [read, isRead.size - read];
+"""
+
+# Helpers injected into every WhatsApp Web page. window.__wtspFind memoizes
+# selector lookups on window.__wtsp so retries don't walk the DOM again;
+# cached nodes are dropped once they leave the document. Scripts that run
+# repeatedly (send verification) live here so only a call crosses the wire.
+_PAGE_HELPERS_JS = """
+window.__wtsp = window.__wtsp || {};
+window.__wtspFind = function (key, selectors, visibleOnly) {
+    const usable = (node) => node && (!visibleOnly || node.offsetParent !== null);
+    const cached = window.__wtsp[key];
+    if (cached && document.contains(cached) && usable(cached)) {
+        return cached;
+    }
+    for (const sel of selectors) {
+        const node = document.querySelector(sel);
+        if (usable(node)) {
+            window.__wtsp[key] = node;
+            return node;
+        }
+        if (node && visibleOnly) {
+            // First match is hidden - look for a visible one further down
+            const nodes = document.querySelectorAll(sel);
+            for (let i = 1; i < nodes.length; i++) {
+                if (usable(nodes[i])) {
+                    window.__wtsp[key] = nodes[i];
+                    return nodes[i];
+                }
+            }
+        }
+    }
+    return null;
+};
+
+// Calls done(true) as soon as a node matching selector is in the page, or
+// done(false) after timeoutMs. A MutationObserver wakes on the insertion
+// itself, so there is no polling interval to wait out.
+window.__wtspWaitFor = function (selector, timeoutMs, done) {
+    if (document.querySelector(selector)) {
+        return done(true);
+    }
+    let timer = null;
+    const observer = new MutationObserver(() => {
+        if (document.querySelector(selector)) {
+            observer.disconnect();
+            clearTimeout(timer);
+            done(true);
+        }
+    });
+    observer.observe(document.body, {childList: true, subtree: true});
+    timer = setTimeout(() => {
+        observer.disconnect();
+        done(false);
+    }, timeoutMs);
+};
+
+// Number of incoming message bubbles added to the page so far. The first call
+// installs the MutationObserver that counts them and returns null, since
+// nothing is known about earlier messages. The count only moves when the DOM
+// gets a new incoming bubble, so an unchanged count means the open chat has
+// nothing new.
+window.__wtspIncomingCount = function () {
+    if (window.__wtsp.incoming === undefined) {
+        const incomingSel = '.message-in, [data-id^="false_"]';
+        window.__wtsp.incoming = 0;
+        new MutationObserver((mutations) => {
+            for (const mutation of mutations) {
+                for (const node of mutation.addedNodes) {
+                    if (node.nodeType === 1 &&
+                            (node.matches(incomingSel) || node.querySelector(incomingSel))) {
+                        window.__wtsp.incoming++;
+                        return;
+                    }
+                }
+            }
+        }).observe(document.body, {childList: true, subtree: true});
+        return null;
+    }
+    return window.__wtsp.incoming;
+};
+
+// Last message container in the open chat, or null
+window.__wtspLastMessage = function () {
+    const sel = '[data-testid="msg-container"]';
+    let list = window.__wtsp.msgList;
+    if (!list || !document.contains(list)) {
+        // Cache the list holding the message rows; lastElementChild is then
+        // O(1) instead of building a NodeList of the whole chat
+        const first = document.querySelector(sel);
+        if (!first) {
+            return null;
+        }
+        list = window.__wtsp.msgList = (first.closest('[role="row"]') || first).parentElement;
+    }
+    const lastRow = list && list.lastElementChild;
+    const lastMessage = lastRow && (lastRow.matches(sel) ? lastRow : lastRow.querySelector(sel));
+    if (lastMessage) {
+        return lastMessage;
+    }
+    // Trailing row isn't a message (date divider, typing indicator...)
+    const messages = document.querySelectorAll(sel);
+    return messages.length ? messages[messages.length - 1] : null;
+};
+
+// Remember the chat's last message before a send, so __wtspSentState only
+// reports on a bubble added after it
+window.__wtspMarkSendStart = function () {
+    window.__wtsp.beforeSend = window.__wtspLastMessage();
+};
+
+// State of the message added by the current send: 'sent' once it has a
+// check/double check icon, 'pending' while it shows the clock, null while no
+// new outgoing bubble is there (an earlier message of ours doesn't count)
+window.__wtspSentState = function () {
+    const lastMessage = window.__wtspLastMessage();
+    if (!lastMessage || lastMessage === window.__wtsp.beforeSend ||
+            !lastMessage.querySelector('[class*="message-out"]')) {
+        return null;
+    }
+    if (lastMessage.querySelector('[data-icon="msg-check"], [data-icon="msg-dblcheck"]')) {
+        return 'sent';
+    }
+    return lastMessage.querySelector('[data-icon="msg-time"]') ? 'pending' : null;
+};
+
+// Calls done('sent') as soon as the new message gets its check icon, or
+// done(<current state>) after timeoutMs. Re-checked only on DOM changes.
+window.__wtspWaitForSent = function (timeoutMs, done) {
+    if (window.__wtspSentState() === 'sent') {
+        return done('sent');
+    }
+    let timer = null;
+    const observer = new MutationObserver(() => {
+        if (window.__wtspSentState() === 'sent') {
+            observer.disconnect();
+            clearTimeout(timer);
+            done('sent');
+        }
+    });
+    observer.observe(document.body, {
+        childList: true, subtree: true, attributes: true, attributeFilter: ['data-icon']
+    });
+    timer = setTimeout(() => {
+        observer.disconnect();
+        done(window.__wtspSentState());
+    }, timeoutMs);
+};
+"""
+
+# Lowercase fragments of connectivity errors raised while fetching ChromeDriver
+_NETWORK_ERROR_TERMS = ("could not reach host", "offline", "network", "connectionerror")
+
+
+def _is_network_error(exc: BaseException) -> bool:
+    """Check whether an exception (or the one that caused it) looks like a connectivity failure"""
+    # Type names and messages of up to three chained exceptions, lowered once
+    parts = []
+    for _ in range(3):
+        if exc is None:
+            break
+        parts.append(f"{type(exc).__name__}|{exc}")
+        exc = exc.__cause__ or exc.__context__
+    signature = "|".join(parts).lower()
+    return any(term in signature for term in _NETWORK_ERROR_TERMS)
+
+
+# History entry recorded for a media offer sent without a caption
+_MEDIA_MARKER_PREFIX = "[Media: "
+
+# Marker the AI appends once a customer confirms an order
+_LEAD_RE = re.compile(r'\[LEAD_CONFIRMED:\s*([^\]]+)\]')
+
+# Columns of the confirmed leads CSV
+_LEAD_FIELDS = (
+    'timestamp', 'phone', 'name', 'city', 'product_confirmed',
+    'conversation_summary', 'status'
+)
+
+# Instruction appended to a lead's history to ask for a re-engagement message
+_FOLLOWUP_PROMPT = (
+    "اكتب رسالة متابعة قصيرة وودية للعميل بخصوص طلبه. "
+    "(Write a short, friendly follow-up message to re-engage the customer about their order.)"
+)
+
+# Sentence endings in AI responses (':\n' ends a list item heading)
+_SENTENCE_ENDS = ('.', '!', '?', ':\n')
+
+
+def _last_sentence_end(text: str, start: int = 0, ends=_SENTENCE_ENDS) -> int:
+    """
+    Find the last sentence ending in text, looking no further back than start
+
+    Args:
+        text: Text to search
+        start: Earliest index worth finding; bounds each scan
+        ends: Sentence-ending strings
+
+    Returns:
+        Index of the last ending at or after start, or -1 if there is none
+    """
+    start = max(start, 0)
+    return max(text.rfind(end, start) for end in ends)
+
+
+# Anything but digits and '+' (\d keeps Arabic-Indic digits, as isdigit() did)
+_PHONE_NONDIGIT_RE = re.compile(r'[^\d+]')
+
+
+@lru_cache(maxsize=4096)
+def _format_phone_number(phone: str) -> str:
+    """
+    Format phone number for WhatsApp
+
+    Pure and called with the same numbers on every monitoring cycle, so
+    results are memoized.
+    """
+    # Remove spaces, dashes, parentheses
+    phone = _PHONE_NONDIGIT_RE.sub('', phone)
+
+    # Add + if missing
+    if not phone.startswith('+'):
+        # Assume Saudi number if no country code
+        if phone.startswith('966'):
+            phone = '+' + phone
+        elif phone.startswith('0'):
+            phone = '+966' + phone[1:]
+        else:
+            phone = '+966' + phone
+
+    return phone
+
+
+# HTTP connections kept to ChromeDriver (monitoring thread, UI thread, spare)
+_DRIVER_POOL_SIZE = 4
+
+# Upper bound on simultaneous OpenAI requests. The HTTP connection pool and the
+# reply executor are both sized from this one value, so the executor can never
+# run more requests than the pool has connections for.
+_MAX_CONCURRENT_AI_CALLS = 4
+
+# Normalizes phone numbers for contact matching in one pass: Arabic digits
+# become Western digits, '+', spaces and dashes are dropped
+_PHONE_STRIP_TABLE = str.maketrans({**ARABIC_NUMERALS, '+': None, ' ': None, '-': None})
+
+
+def _clean_lookup_phone(phone: str) -> str:
+    """Normalize a phone number for contact matching (Western digits, no +, spaces or dashes)"""
+    return phone.translate(_PHONE_STRIP_TABLE)
+
+
+def _build_contact_index(df) -> Dict[str, Tuple[str, str]]:
+    """
+    Map cleaned phone numbers to (name, city) for a contacts DataFrame
+
+    The first row wins for duplicate numbers, matching the old row-by-row scan.
+    The 'address' column in e-commerce CSVs is actually the city.
+    """
+    index: Dict[str, Tuple[str, str]] = {}
+    if df is None:
+        return index
+    phone_col = 'phone_formatted' if 'phone_formatted' in df.columns else 'phone'
+    if phone_col not in df.columns:
+        return index
+    names = df['name'].astype(str) if 'name' in df.columns else repeat('Customer')
+    cities = df['address'].astype(str) if 'address' in df.columns else repeat('')
+    for row_phone, name, city in zip(df[phone_col].astype(str), names, cities):
+        row_phone = _clean_lookup_phone(row_phone)
+        if row_phone:
+            index.setdefault(row_phone, (name, city))
+    return index
+
+
+# Local part of a number (Saudi mobile numbers have 9 digits after the
+# country code); matches numbers stored with and without country code or 0
+_PHONE_SUFFIX_DIGITS = 9
+
+
+def _build_suffix_index(index: Dict[str, Tuple[str, str]]) -> Dict[str, Tuple[str, str]]:
+    """Re-key a contact index by the last _PHONE_SUFFIX_DIGITS digits (first entry wins)"""
+    suffixes: Dict[str, Tuple[str, str]] = {}
+    for row_phone, contact in index.items():
+        suffixes.setdefault(row_phone[-_PHONE_SUFFIX_DIGITS:], contact)
+    return suffixes
+
+
+# Prefix of seen-set entries keyed by message text (no DOM ID available);
+# message IDs never start with it (they look like "false_<chat>_<id>")
+_TEXT_ID_PREFIX = "text:"
+
+
+class _BoundedIdSet:
+    """Set of message IDs that forgets the oldest ID once maxlen is reached"""
+
+    def __init__(self, maxlen: int = 100):
+        self._order: Deque[str] = deque()
+        self._ids = set()
+        self.maxlen = maxlen
+
+    def add(self, msg_id: str):
+        if msg_id in self._ids:
+            return
+        if len(self._order) >= self.maxlen:
+            self._ids.discard(self._order.popleft())
+        self._order.append(msg_id)
+        self._ids.add(msg_id)
+
+    def __contains__(self, msg_id) -> bool:
+        return msg_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._order)
 
 
 class WhatsAppBot:
@@ -64,6 +653,11 @@ class WhatsAppBot:
         api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
         self.ai_enabled = False
         self.openai_client = None
+        # One HTTP connection pool shared by every OpenAI request (main replies
+        # and continuations); we own it, so close() can release it
+        self._http_client: Optional[httpx.Client] = None
+        # Workers generating replies for several contacts at once, built on first use
+        self._ai_executor: Optional[ThreadPoolExecutor] = None
 
         if api_key:
             # Clean API key (remove quotes if present)
@@ -95,7 +689,17 @@ class WhatsAppBot:
                     params = list(init_signature.parameters.keys())
                     
                     # Only use parameters that definitely exist in the signature
-                    init_kwargs = {'api_key': api_key}
+                    # Keep-alive sockets outlive a monitoring cycle, so replies don't
+                    # pay a new TLS handshake after a quiet period. DefaultHttpxClient
+                    # keeps the SDK's default timeouts and redirect handling.
+                    self._http_client = DefaultHttpxClient(
+                        limits=httpx.Limits(
+                            max_connections=_MAX_CONCURRENT_AI_CALLS,
+                            max_keepalive_connections=_MAX_CONCURRENT_AI_CALLS,
+                            keepalive_expiry=120.0
+                        )
+                    )
+                    init_kwargs = {'api_key': api_key, 'http_client': self._http_client}
                     
                     # Try to initialize
                     self.openai_client = OpenAI(**init_kwargs)
@@ -121,7 +725,7 @@ class WhatsAppBot:
                         os.environ['OPENAI_API_KEY'] = api_key
                         try:
                             # Initialize without api_key parameter (use env var)
-                            self.openai_client = OpenAI()
+                            self.openai_client = OpenAI(http_client=self._http_client)
                             self.ai_enabled = True
                             print("✅ OpenAI API configured (using environment variable method)")
                         except Exception as env_err:
@@ -157,6 +761,9 @@ class WhatsAppBot:
                 print("   ⚠️  AI responses will be disabled")
                 self.ai_enabled = False
                 self.openai_client = None
+                if self._http_client is not None:
+                    self._http_client.close()
+                    self._http_client = None
         else:
             print("⚠️  OpenAI API key not found. AI responses disabled.")
             print("   Add OPENAI_API_KEY to .env file to enable AI responses")
@@ -165,21 +772,37 @@ class WhatsAppBot:
         self.system_prompt = system_prompt or """You are a helpful customer service representative.
 Respond professionally in the customer's language (Arabic or English).
 Keep responses concise and helpful."""
+        self._system_message_cache: Optional[Dict] = None  # See _system_message
 
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
 
         # Conversation tracking
-        self.conversations: Dict[str, List[Dict]] = {}
-        self.last_messages: Dict[str, str] = {}  # Legacy text-based tracking
-        self.seen_message_ids: Dict[str, set] = {}  # New ID-based tracking
+        # Each history is a ring buffer: appends are O(1) and the oldest
+        # messages are evicted automatically once the limit is reached
+        self.conversation_history_limit = 20
+        self.conversations: Dict[str, Deque[Dict]] = defaultdict(self._new_history)
+        # Seen incoming messages per contact (last 100): DOM message IDs, or
+        # _TEXT_ID_PREFIX + text when only the fallback lookup found the message.
+        self.seen_message_ids: Dict[str, _BoundedIdSet] = {}
         self.monitored_contacts: List[str] = []
         
         # Automatic monitoring
         self.auto_monitoring_active = False
         self.monitoring_thread: Optional[threading.Thread] = None
-        self.monitoring_stopped_contacts: set = set()  # Contacts that have monitoring stopped
+        self._stop_event = threading.Event()  # Set to wake the monitoring thread on stop
+        # Contacts that have monitoring stopped. Never mutated in place: writers
+        # swap in a new frozenset under _contacts_lock, so readers need no lock
+        # and can iterate it safely
+        self.monitoring_stopped_contacts: frozenset = frozenset()
         self.monitoring_check_interval = 5  # Check every 5 seconds
-        self.monitoring_lock = threading.Lock()  # Lock for thread-safe operations
+        # Every N cycles, check all contacts even if the sidebar shows them read
+        # (a badge cleared on the phone or by a send hides new replies)
+        self.full_check_every_cycles = 12
+        self.monitoring_lock = threading.Lock()  # Guards starting/stopping the monitoring thread
+        self._contacts_lock = threading.RLock()  # Serializes updates of monitoring_stopped_contacts
+        self.verbose_monitoring = False  # Print step-by-step details of each message check
+        self._last_error_signature: Optional[Tuple[type, str]] = None  # See _report_traceback
+        self._repeated_errors = 0
 
         # Statistics
         self.messages_sent = 0
@@ -187,14 +810,39 @@ Keep responses concise and helpful."""
         self.messages_delivered = 0
         self.messages_read = 0
         self.ai_responses_sent = 0
+        self.min_send_gap = 1.0  # Minimum seconds between two sends, see _throttle_send
+        self._last_send_at: Optional[float] = None
+        self.read_receipts_ttl = 5.0  # get_stats rescans read receipts at most this often (seconds)
+        self._receipts_checked_at: Optional[float] = None
 
         # Leads tracking
         self.leads_file = Path.cwd() / "confirmed_leads.csv"
+        # Follow-up batches submitted to OpenAI and not yet sent, kept across restarts
+        self.batches_file = Path.cwd() / "pending_batches.json"
+        self._leads_lock = threading.Lock()  # Replies are generated (and leads saved) in parallel
+        # Parsed leads file, loaded on first use. Status updates edit it in memory
+        # and are written back after leads_flush_delay seconds (or on close)
+        self._leads_cache: Optional[List[Dict]] = None
+        self._leads_mtime: Optional[int] = None  # File mtime the cache matches
+        self._leads_dirty = False
+        self._leads_flush_timer: Optional[threading.Timer] = None
+        self.leads_flush_delay = 2.0
+        # Append handle for new leads, opened on the first save and kept open
+        self._leads_fh = None
+        self._leads_writer = None
         self._initialize_leads_file()
 
         # Setup browser
         self.driver = None
         self.wait = None
+        self._window_prepared = False  # Window maximized/focused once per session
+        self._page_helpers_registered = False  # _PAGE_HELPERS_JS runs on every page load
+        self._current_open_phone: Optional[str] = None  # Chat loaded by the last _open_chat
+        self._current_chat_scanned = False  # get_new_messages fully scanned that page load
+        self._incoming_checked: Optional[Tuple[str, int]] = None  # (open chat, incoming count) last checked
+        self._unread_badges_seen = False  # _SIDEBAR_UNREAD_JS has recognized a badge this session
+        self._input_box = None  # Chat input box of the currently loaded chat
+        self._actions = None  # ActionChains bound to the driver, built on first use
         self._setup_browser(headless)
 
     def _setup_browser(self, headless: bool = False):
@@ -275,8 +923,7 @@ Keep responses concise and helpful."""
                 service = Service(driver_path)
                 print(f"   ✅ ChromeDriver found at: {driver_path}")
             except Exception as driver_error:
-                error_msg = str(driver_error).lower()
-                if "could not reach host" in error_msg or "offline" in error_msg or "network" in error_msg:
+                if _is_network_error(driver_error):
                     print("   ⚠️  Network issue while downloading ChromeDriver")
                     print("   💡 Trying to find ChromeDriver in system PATH...")
                     # Try to find chromedriver in PATH
@@ -312,6 +959,10 @@ Keep responses concise and helpful."""
                 print(f"   ⚠️  Could not verify browser: {verify_error}")
                 # Continue anyway - might still work
 
+            # Let the monitoring thread and the UI thread talk to ChromeDriver
+            # over separate connections instead of queueing for a single one
+            self._widen_driver_pool()
+
             # Stealth modifications
             try:
                 self.driver.execute_cdp_cmd('Network.setUserAgentOverride', {
@@ -325,6 +976,16 @@ Keep responses concise and helpful."""
                 print(f"   ⚠️  Could not apply stealth modifications: {stealth_error}")
                 print("   ℹ️  Continuing without stealth modifications...")
 
+            # Page helpers: registered once, re-run by Chrome on every page load
+            try:
+                self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+                    "source": _PAGE_HELPERS_JS
+                })
+                self._page_helpers_registered = True
+            except Exception as helpers_error:
+                print(f"   ⚠️  Could not register page helpers: {helpers_error}")
+                print("   ℹ️  Helpers will be injected before each media send instead")
+
             self.wait = WebDriverWait(self.driver, 20)
             print("✅ Browser setup complete")
 
@@ -332,8 +993,7 @@ Keep responses concise and helpful."""
             self._login_whatsapp()
 
         except Exception as e:
-            error_msg = str(e).lower()
-            if "could not reach host" in error_msg or "offline" in error_msg:
+            if _is_network_error(e):
                 print(f"❌ Browser setup failed: Network connection issue")
                 print(f"   Error details: {e}")
                 print("   💡 Please check:")
@@ -345,14 +1005,35 @@ Keep responses concise and helpful."""
                 print(f"❌ Browser setup failed: {e}")
             raise
 
+    def _widen_driver_pool(self):
+        """
+        Raise the ChromeDriver HTTP pool size above urllib3's default of one connection
+
+        With a single pooled connection, a command from one thread waits for
+        (or discards) the other thread's connection. Only pools created after
+        the change pick up the new size, so the existing ones are dropped.
+
+        selenium 4.26 has no public way to pass pool arguments to
+        webdriver.Chrome (ClientConfig's init_args_for_pool_manager only reaches
+        a RemoteConnection we build, and Chrome builds its own), so this uses the
+        connection's private _conn. requirements.txt pins the selenium version
+        this was checked against; if _conn is gone, the default pool is kept and
+        that is reported.
+        """
+        conn = getattr(self.driver.command_executor, '_conn', None)
+        if not isinstance(conn, urllib3.PoolManager):
+            print("   ⚠️  ChromeDriver connection pool not found - keeping selenium's default")
+            return
+        conn.connection_pool_kw['maxsize'] = _DRIVER_POOL_SIZE
+        conn.clear()
+
     def _login_whatsapp(self):
         """Login to WhatsApp Web"""
         print("🔐 Connecting to WhatsApp Web...")
 
         self.driver.get("https://web.whatsapp.com")
-        time.sleep(3)
 
-        # Check if already logged in
+        # Check if already logged in (the wait polls, no need to sleep first)
         try:
             # Look for chat list (logged in indicator)
             self.wait.until(
@@ -381,44 +1062,83 @@ Keep responses concise and helpful."""
                 EC.presence_of_element_located((By.CSS_SELECTOR, "[aria-label='Chat list']"))
             )
             print("✅ Login successful! Session saved.")
-            time.sleep(2)
+            # Give the chat list a moment to fill in instead of a fixed pause
+            try:
+                WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, _CHAT_ROW_SELECTOR))
+                )
+            except TimeoutException:
+                pass
         except TimeoutException:
             print("❌ Login timeout. Please try again.")
             raise
 
     def _format_phone(self, phone: str) -> str:
         """Format phone number for WhatsApp"""
-        # Remove spaces, dashes, parentheses
-        phone = ''.join(c for c in phone if c.isdigit() or c == '+')
-
-        # Add + if missing
-        if not phone.startswith('+'):
-            # Assume Saudi number if no country code
-            if phone.startswith('966'):
-                phone = '+' + phone
-            elif phone.startswith('0'):
-                phone = '+966' + phone[1:]
-            else:
-                phone = '+966' + phone
+        return _format_phone_number(phone)
 
-        return phone
+    def _new_history(self) -> Deque[Dict]:
+        """Create an empty, bounded conversation history"""
+        return deque(maxlen=self.conversation_history_limit)
 
     def _initialize_leads_file(self):
         """Initialize the leads CSV file with headers if it doesn't exist"""
         if not self.leads_file.exists():
             with open(self.leads_file, 'w', newline='', encoding='utf-8') as f:
                 writer = csv.writer(f)
-                writer.writerow([
-                    'timestamp',
-                    'phone',
-                    'name',
-                    'city',
-                    'product_confirmed',
-                    'conversation_summary',
-                    'status'
-                ])
+                writer.writerow(_LEAD_FIELDS)
             print(f"✅ Created leads file: {self.leads_file}")
 
+    @property
+    def contacts_df(self):
+        """DataFrame with customer data (name, phone, address/city)"""
+        return self._contacts_df
+
+    @contacts_df.setter
+    def contacts_df(self, df):
+        self._contacts_df = df
+        # Rebuilt from the new data on the next lookup
+        self._contact_index = None
+        self._contact_suffix_index = None
+        self._contact_lookups: Dict[str, Optional[Tuple[str, str]]] = {}
+
+    def _lookup_contact(self, phone: str) -> Optional[Tuple[str, str]]:
+        """
+        Find a customer's (name, city) in contacts_df by phone number
+
+        The DataFrame is indexed once by cleaned phone number, so an exact match
+        is a dict lookup. A number written with/without country code is matched
+        by a second dict keyed on the last digits. Only if both miss are the
+        cleaned numbers scanned for one containing the other, as before.
+        Results (including misses) are remembered per phone until contacts_df
+        is replaced, since follow-ups look up the same numbers every cycle.
+
+        Args:
+            phone: Customer phone number
+
+        Returns:
+            (name, city) tuple, or None if the customer isn't in contacts_df
+        """
+        if phone in self._contact_lookups:
+            return self._contact_lookups[phone]
+        if self._contact_index is None:
+            index = _build_contact_index(self._contacts_df)
+            # Suffix index first: another thread may already see _contact_index
+            self._contact_suffix_index = _build_suffix_index(index)
+            self._contact_index = index
+        phone_clean = _clean_lookup_phone(phone)
+        contact = self._contact_index.get(phone_clean)
+        if contact is None and len(phone_clean) >= _PHONE_SUFFIX_DIGITS:
+            contact = self._contact_suffix_index.get(phone_clean[-_PHONE_SUFFIX_DIGITS:])
+        if contact is None:
+            contact = next(
+                (row_contact for row_phone, row_contact in self._contact_index.items()
+                 if phone_clean in row_phone or row_phone in phone_clean),
+                None
+            )
+        self._contact_lookups[phone] = contact
+        return contact
+
     def save_lead(self, phone: str, product: str, conversation_summary: str = ""):
         """
         Save a confirmed lead to the CSV file
@@ -435,26 +1155,11 @@ Keep responses concise and helpful."""
 
             if self.contacts_df is not None:
                 try:
-                    # Format phone for matching (convert Arabic numerals, remove +, spaces, etc.)
-                    phone_clean = convert_arabic_numerals(phone)
-                    phone_clean = phone_clean.replace('+', '').replace(' ', '').replace('-', '')
-
-                    # Try to find customer in contacts_df
-                    # Match by phone number (checking both formatted and unformatted versions)
-                    match_found = False
-                    for idx, row in self.contacts_df.iterrows():
-                        row_phone = str(row.get('phone_formatted', row.get('phone', '')))
-                        row_phone = convert_arabic_numerals(row_phone)
-                        row_phone = row_phone.replace('+', '').replace(' ', '').replace('-', '')
-                        if phone_clean in row_phone or row_phone in phone_clean:
-                            name = str(row.get('name', 'Customer'))
-                            # The 'address' column in e-commerce CSV is actually the city
-                            city = str(row.get('address', ''))
-                            match_found = True
-                            print(f"✅ Found customer in contacts: {name} from {city}")
-                            break
-
-                    if not match_found:
+                    contact = self._lookup_contact(phone)
+                    if contact:
+                        name, city = contact
+                        print(f"✅ Found customer in contacts: {name} from {city}")
+                    else:
                         print(f"⚠️  Customer {phone} not found in contacts CSV - using defaults")
                 except Exception as lookup_err:
                     print(f"⚠️  Error looking up customer data: {lookup_err}")
@@ -462,24 +1167,48 @@ Keep responses concise and helpful."""
             # Get timestamp
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            # Append to CSV
-            with open(self.leads_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    timestamp,
-                    phone,
-                    name,
-                    city,
-                    product,
-                    conversation_summary,
-                    'pending'
-                ])
+            # Append to CSV (and to the parsed leads, if loaded)
+            row = [timestamp, phone, name, city, product, conversation_summary, 'pending']
+            with self._leads_lock:
+                if self._leads_fh is None:
+                    self._leads_fh = open(self.leads_file, 'a', newline='', encoding='utf-8')
+                    self._leads_writer = csv.writer(self._leads_fh)
+                self._leads_writer.writerow(row)
+                # Hand the row to the OS right away - a lead must survive a crash
+                self._leads_fh.flush()
+                if self._leads_cache is not None:
+                    self._leads_cache.append(dict(zip(_LEAD_FIELDS, row)))
+                    self._leads_mtime = self._leads_file_mtime()
 
             print(f"✅ Lead saved: {name} ({phone}) from {city} - {product}")
 
         except Exception as e:
             print(f"⚠️  Failed to save lead: {e}")
 
+    def _leads_file_mtime(self) -> Optional[int]:
+        """Modification time of the leads file in ns, None if it doesn't exist"""
+        try:
+            return self.leads_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load_leads(self) -> List[Dict]:
+        """
+        Parsed leads file, read from disk only when it changed (call under _leads_lock)
+
+        The file is re-read if it was modified outside the bot, unless there are
+        unflushed status updates that a re-read would lose.
+        """
+        mtime = self._leads_file_mtime()
+        if self._leads_cache is None or (not self._leads_dirty and mtime != self._leads_mtime):
+            leads = []
+            if mtime is not None:
+                with open(self.leads_file, 'r', encoding='utf-8') as f:
+                    leads = list(csv.DictReader(f))
+            self._leads_cache = leads
+            self._leads_mtime = mtime
+        return self._leads_cache
+
     def get_leads(self) -> List[Dict]:
         """
         Read all leads from the CSV file
@@ -489,10 +1218,9 @@ Keep responses concise and helpful."""
         """
         leads = []
         try:
-            if self.leads_file.exists():
-                with open(self.leads_file, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    leads = list(reader)
+            with self._leads_lock:
+                # Copies, so callers can't edit the cached rows
+                leads = [dict(lead) for lead in self._load_leads()]
         except Exception as e:
             print(f"⚠️  Failed to read leads: {e}")
         return leads
@@ -501,38 +1229,210 @@ Keep responses concise and helpful."""
         """
         Update the status of a lead
 
+        The change is made in memory right away; the file is rewritten once
+        after leads_flush_delay seconds, so a burst of updates costs one write.
+
         Args:
             phone: Customer phone number
             status: New status (pending/contacted/converted/rejected)
         """
         try:
+            with self._leads_lock:
+                lead = next((lead for lead in self._load_leads() if lead['phone'] == phone), None)
+                if lead is None:
+                    print(f"⚠️  Lead not found for {phone}")
+                    return
+
+                lead['status'] = status
+                self._leads_dirty = True
+                if self._leads_flush_timer is None:
+                    self._leads_flush_timer = threading.Timer(self.leads_flush_delay, self.flush_leads)
+                    self._leads_flush_timer.daemon = True
+                    self._leads_flush_timer.start()
+
+            print(f"✅ Lead status updated: {phone} -> {status}")
+
+        except Exception as e:
+            print(f"⚠️  Failed to update lead status: {e}")
+
+    def _close_leads_file(self):
+        """Close the append handle for new leads (call under _leads_lock)"""
+        if self._leads_fh is not None:
+            self._leads_fh.close()
+            self._leads_fh = None
+            self._leads_writer = None
+
+    def flush_leads(self):
+        """Write pending lead status updates to the CSV file"""
+        try:
+            with self._leads_lock:
+                self._leads_flush_timer = None
+                if not self._leads_dirty:
+                    return
+
+                # Write into a temporary file swapped in atomically, so a crash
+                # mid-write (or a concurrent reader) never sees a truncated file
+                tmp_file = self.leads_file.with_name(self.leads_file.name + '.tmp')
+                with open(tmp_file, 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.DictWriter(f, fieldnames=_LEAD_FIELDS)
+                    writer.writeheader()
+                    writer.writerows(self._leads_cache)
+                # Close the append handle first - it would point at the replaced
+                # file, and Windows can't replace a file that is still open.
+                # save_lead reopens it on the next new lead.
+                self._close_leads_file()
+                os.replace(tmp_file, self.leads_file)
+                self._leads_dirty = False
+                self._leads_mtime = self._leads_file_mtime()
+
+        except Exception as e:
+            print(f"⚠️  Failed to write lead status updates: {e}")
+
+    def pending_followup_batches(self) -> List[str]:
+        """
+        IDs of follow-up batches submitted but not yet sent
+
+        Returns:
+            Batch IDs, oldest first
+        """
+        try:
+            if self.batches_file.exists():
+                return json.loads(self.batches_file.read_text(encoding='utf-8'))
+        except Exception as e:
+            print(f"⚠️  Could not read pending batches: {e}")
+        return []
+
+    def _save_pending_batches(self, batch_ids: List[str]):
+        """Write the pending follow-up batch IDs, replacing the file atomically"""
+        tmp_file = self.batches_file.with_name(self.batches_file.name + '.tmp')
+        tmp_file.write_text(json.dumps(batch_ids), encoding='utf-8')
+        os.replace(tmp_file, self.batches_file)
+
+    def submit_followup_batch(self, leads: Optional[List[Dict]] = None,
+                              statuses: Tuple[str, ...] = ('pending', 'contacted')) -> Optional[str]:
+        """
+        Generate follow-up messages for leads through the OpenAI Batch API
+
+        Follow-ups aren't urgent, so they go through the batch pool (half the
+        price of live requests, results within 24h) instead of one live request
+        per lead. Send them with send_followup_batch once the batch completes.
+
+        Args:
+            leads: Leads to follow up (defaults to get_leads())
+            statuses: Only leads with one of these statuses are included
+
+        Returns:
+            Batch ID, or None if nothing was submitted
+        """
+        if not self.ai_enabled:
+            print("⚠️  AI not enabled - cannot generate follow-ups")
+            return None
+
+        if leads is None:
             leads = self.get_leads()
+        phones = list(dict.fromkeys(
+            self._format_phone(lead['phone']) for lead in leads
+            if lead.get('phone') and lead.get('status') in statuses
+        ))
+        if not phones:
+            print("ℹ️  No leads to follow up")
+            return None
 
-            # Update the status
-            updated = False
-            for lead in leads:
-                if lead['phone'] == phone:
-                    lead['status'] = status
-                    updated = True
-                    break
+        try:
+            lines = []
+            for phone in phones:
+                messages = [
+                    self._system_message(),
+                    *self._prompt_history(phone),
+                    {"role": "user", "content": _FOLLOWUP_PROMPT}
+                ]
+                lines.append(json.dumps({
+                    "custom_id": phone,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {"model": self.model, "messages": messages, "max_tokens": 400}
+                }, ensure_ascii=False))
+
+            batch_input = self.openai_client.files.create(
+                file=("followups.jsonl", "\n".join(lines).encode('utf-8')),
+                purpose="batch"
+            )
+            batch = self.openai_client.batches.create(
+                input_file_id=batch_input.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
 
-            if not updated:
-                print(f"⚠️  Lead not found for {phone}")
-                return
+            self._save_pending_batches(self.pending_followup_batches() + [batch.id])
+            print(f"✅ Follow-up batch submitted for {len(phones)} lead(s): {batch.id}")
+            return batch.id
 
-            # Write back to CSV
-            with open(self.leads_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=[
-                    'timestamp', 'phone', 'name', 'city', 'product_confirmed',
-                    'conversation_summary', 'status'
-                ])
-                writer.writeheader()
-                writer.writerows(leads)
+        except Exception as e:
+            print(f"⚠️  Failed to submit follow-up batch: {e}")
+            return None
 
-            print(f"✅ Lead status updated: {phone} -> {status}")
+    def send_followup_batch(self, batch_id: str) -> int:
+        """
+        Send the follow-up messages of a completed batch
+
+        Args:
+            batch_id: ID returned by submit_followup_batch
+
+        Returns:
+            Number of follow-ups sent (0 while the batch is still running)
+        """
+        try:
+            batch = self.openai_client.batches.retrieve(batch_id)
+            if batch.status != "completed":
+                print(f"⏳ Follow-up batch {batch_id} is {batch.status}")
+                if batch.status in ("failed", "expired", "cancelled"):
+                    self._save_pending_batches(
+                        [pending for pending in self.pending_followup_batches() if pending != batch_id]
+                    )
+                return 0
+
+            results = []
+            if batch.output_file_id:
+                output = self.openai_client.files.content(batch.output_file_id).text
+                results = [json.loads(line) for line in output.splitlines() if line.strip()]
+
+            sent = 0
+            for result in results:
+                phone = result.get('custom_id')
+                response = result.get('response') or {}
+                if not phone or response.get('status_code') != 200:
+                    print(f"⚠️  No follow-up generated for {phone}")
+                    continue
+                followup = response['body']['choices'][0]['message']['content'].strip()
+                was_monitored = phone in self.monitored_contacts
+                if followup and self.send_message(phone, followup):
+                    sent += 1
+                    # New contacts get the message recorded by send_message itself
+                    if was_monitored:
+                        self.conversations[phone].append({"role": "assistant", "content": followup})
+
+            self._save_pending_batches(
+                [pending for pending in self.pending_followup_batches() if pending != batch_id]
+            )
+            print(f"✅ Sent {sent} follow-up(s) from batch {batch_id}")
+            return sent
 
         except Exception as e:
-            print(f"⚠️  Failed to update lead status: {e}")
+            print(f"⚠️  Failed to send follow-up batch {batch_id}: {e}")
+            return 0
+
+    def _throttle_send(self):
+        """
+        Keep at least min_send_gap seconds between consecutive sends
+
+        Only sleeps for whatever part of the gap hasn't already passed, so time
+        spent checking chats or generating replies counts toward it.
+        """
+        if self._last_send_at is not None:
+            remaining = self.min_send_gap - (time.monotonic() - self._last_send_at)
+            if remaining > 0:
+                time.sleep(remaining)
+        self._last_send_at = time.monotonic()
 
     def send_message(
         self,
@@ -553,24 +1453,25 @@ Keep responses concise and helpful."""
         """
         try:
             phone = self._format_phone(phone)
+            self._throttle_send()
             print(f"\n📤 Sending to {phone}...")
 
             # Open chat
-            url = f"https://web.whatsapp.com/send?phone={phone.replace('+', '')}"
-            self.driver.get(url)
-
-            # Wait for chat to load
-            time.sleep(random.uniform(3, 5))
+            self._open_chat(phone)
 
-            # Check if number is valid (chat loaded)
+            # Wait until the chat is ready, or WhatsApp says the number is invalid
+            # Keep the input box for _send_text/_send_media
             try:
-                self.wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "[contenteditable='true'][data-tab='10']"))
+                chat_state = WebDriverWait(self.driver, 20, poll_frequency=0.1).until(
+                    lambda driver: driver.execute_script(_CHAT_READY_JS, _INPUT_BOX_SELECTOR)
                 )
             except TimeoutException:
+                chat_state = None
+            if chat_state is None or chat_state == 'invalid':
                 print(f"❌ Invalid number or chat not loaded: {phone}")
                 self.messages_failed += 1
                 return False
+            self._input_box = chat_state
 
             # Check if this is the first time we're contacting this customer (initial offer)
             is_first_contact = phone not in self.monitored_contacts
@@ -582,86 +1483,37 @@ Keep responses concise and helpful."""
             
             # Send media if provided
             if media_path and os.path.exists(media_path):
-                media_result = self._send_media(media_path, message)
-                if media_result:
-                    # Media sent successfully
+                if self._send_media(media_path, message):
                     print(f"✅ Message with media sent to {phone}")
-                    self.messages_sent += 1
-                    
-                    # If this is the first contact, add offer message to conversation history
-                    # (History was already cleared in start_monitoring_contact above)
-                    if is_first_contact:
-                        # Add our offer message (caption if media, or full message) as assistant message
-                        self.conversations[phone].append({
-                            "role": "assistant",
-                            "content": message if message else f"[Media: {Path(media_path).name}]"
-                        })
-                        print(f"   Added offer message to conversation history for {phone}")
-                        
-                        # Automatically start background monitoring if not already running
-                        if not self.auto_monitoring_active:
-                            self.start_auto_monitoring()
-                        else:
-                            print(f"   ✅ Auto-monitoring is already active for this contact")
-                    # If already in monitoring, this is an AI response - don't modify history
-                    # (History is already managed in generate_ai_response)
-                    
-                    return True
                 else:
                     # Media send had issues, but might have still sent
-                    # Check if we should fall back to text
                     print("⚠️  Media verification uncertain - message may have been sent")
                     print("💡 Skipping text fallback to avoid duplicate messages")
                     # Mark as sent anyway - user can check WhatsApp
-                    self.messages_sent += 1
-                    
-                    # If this is the first contact, add offer message to conversation history
-                    # (History was already cleared in start_monitoring_contact above)
-                    if is_first_contact:
-                        # Add our offer message as assistant message
-                        self.conversations[phone].append({
-                            "role": "assistant",
-                            "content": message if message else f"[Media: {Path(media_path).name}]"
-                        })
-                        print(f"   Added offer message to conversation history for {phone}")
-                        
-                        # Automatically start background monitoring if not already running
-                        if not self.auto_monitoring_active:
-                            self.start_auto_monitoring()
-                        else:
-                            print(f"   ✅ Auto-monitoring is already active for this contact")
-                    # If already in monitoring, this is an AI response - don't modify history
-                    
-                    return True
+                offer_content = message if message else f"{_MEDIA_MARKER_PREFIX}{Path(media_path).name}]"
             else:
                 # No media - send text only
                 if not self._send_text(message):
                     self.messages_failed += 1
                     return False
 
-            # Verify sent
-            time.sleep(2)
-            print(f"✅ Message sent to {phone}")
+                # Verify sent: returns as soon as the message shows a status icon
+                self._ensure_page_helpers()
+                self.driver.execute_async_script(
+                    "window.__wtspWaitForSent(arguments[0], arguments[arguments.length - 1]);",
+                    5000
+                )
+                print(f"✅ Message sent to {phone}")
+                offer_content = message
 
             self.messages_sent += 1
 
             # If this is the first contact, add offer message to conversation history
-            # (History was already cleared in start_monitoring_contact above)
-            if is_first_contact:
-                # Add our offer message as assistant message (from bot)
-                self.conversations[phone].append({
-                    "role": "assistant",
-                    "content": message
-                })
-                print(f"   Added offer message to conversation history for {phone}")
-                
-                # Automatically start background monitoring if not already running
-                if not self.auto_monitoring_active:
-                    self.start_auto_monitoring()
-                else:
-                    print(f"   ✅ Auto-monitoring is already active for this contact")
+            # (History was already cleared in start_monitoring_contact above).
             # If already in monitoring, this is an AI response - don't modify history
             # (History is already managed in generate_ai_response)
+            if is_first_contact:
+                self._record_offer(phone, offer_content)
 
             return True
 
@@ -670,48 +1522,128 @@ Keep responses concise and helpful."""
             self.messages_failed += 1
             return False
 
-    def _send_text(self, message: str) -> bool:
-        """Send text message with proper line break handling using system clipboard"""
-        try:
-            import pyperclip
+    def _record_offer(self, phone: str, content: str):
+        """Add our offer message to a new contact's history and make sure it is monitored"""
+        # Add our offer message as assistant message (from bot)
+        self.conversations[phone].append({
+            "role": "assistant",
+            "content": content
+        })
+        print(f"   Added offer message to conversation history for {phone}")
+
+        # Automatically start background monitoring if not already running
+        if not self.auto_monitoring_active:
+            self.start_auto_monitoring()
+        else:
+            print(f"   ✅ Auto-monitoring is already active for this contact")
+
+    def _open_chat(self, phone: str, reuse: bool = False) -> bool:
+        """
+        Navigate to the chat with a (formatted) phone number
+
+        Args:
+            phone: Formatted phone number
+            reuse: Keep the page as is if this chat is already open (it may not
+                have rendered yet - see _current_chat_scanned)
 
-            # Find message input box
-            input_box = self.wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "[contenteditable='true'][data-tab='10']"))
+        Returns:
+            True if the page was loaded, False if the open chat was reused
+        """
+        if reuse and self._current_open_phone == phone:
+            return False
+        url = f"https://web.whatsapp.com/send?phone={phone.replace('+', '')}"
+        self._current_open_phone = None
+        self._current_chat_scanned = False
+        self.driver.get(url)
+        self._current_open_phone = phone
+        # Elements from the previous page are gone after navigation
+        self._input_box = None
+        return True
+
+    def _get_input_box(self):
+        """Return the chat input box, reusing the one found when the chat was opened"""
+        if self._input_box is None:
+            self._input_box = self.wait.until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, _INPUT_BOX_SELECTOR))
             )
+        return self._input_box
 
-            # Focus the input box
+    def _focus_input_box(self):
+        """Click the chat input box and return it, re-locating it if it went stale"""
+        input_box = self._get_input_box()
+        try:
             input_box.click()
-            time.sleep(0.5)
-
-            # Copy message to system clipboard
-            # This preserves line breaks exactly as they are
-            pyperclip.copy(message)
-            print(f"📋 Copied message to clipboard ({len(message)} chars, {message.count(chr(10))} line breaks)")
-
-            # Paste using Ctrl+V (Cmd+V on Mac)
-            # This is the most reliable way - same as manual paste
-            import platform
-            if platform.system() == 'Darwin':  # macOS
-                input_box.send_keys(Keys.COMMAND, 'v')
-            else:  # Windows/Linux
-                input_box.send_keys(Keys.CONTROL, 'v')
-
-            time.sleep(1)
-
-            # Verify content was pasted
-            content_check = self.driver.execute_script(
-                """
-                const el = arguments[0];
-                return el.textContent || el.innerText || '';
-                """,
-                input_box
-            )
-            print(f"✓ Content in input box: {len(content_check)} chars")
+        except StaleElementReferenceException:
+            self._input_box = None
+            input_box = self._get_input_box()
+            input_box.click()
+        return input_box
+
+    def _get_actions(self) -> ActionChains:
+        """ActionChains bound to the driver"""
+        # perform() empties the queued actions, so one chain can be reused
+        if self._actions is None:
+            self._actions = ActionChains(self.driver)
+        return self._actions
+
+    def _press_return(self):
+        """Press Enter on whatever element has focus"""
+        self._get_actions().send_keys(Keys.RETURN).perform()
+
+    def _insert_text(self, input_box, text: str):
+        """
+        Put text into the focused chat input box
+
+        Chrome's Input.insertText types each line like an IME commit, leaving
+        the user's clipboard alone; line breaks are entered with Shift+Enter
+        (Enter alone would send). If CDP isn't available, the text is pasted
+        from the system clipboard instead.
+
+        Args:
+            input_box: The focused input box
+            text: Text to insert, may contain line breaks
+        """
+        try:
+            for i, line in enumerate(text.split('\n')):
+                if i:
+                    self._get_actions().key_down(Keys.SHIFT).send_keys(Keys.ENTER).key_up(Keys.SHIFT).perform()
+                if line:
+                    self.driver.execute_cdp_cmd('Input.insertText', {'text': line})
+            print(f"⌨️  Typed {len(text)} chars ({text.count(chr(10))} line breaks)")
+            return
+        except Exception as e:
+            print(f"⚠️  Could not type text directly ({e}) - pasting from clipboard instead")
+            # Drop anything typed before the failure so the paste isn't doubled
+            input_box.send_keys(_PASTE_MODIFIER, 'a')
+            input_box.send_keys(Keys.DELETE)
+
+        import pyperclip
+
+        # Copy to system clipboard - this preserves line breaks exactly as they are
+        pyperclip.copy(text)
+        print(f"📋 Copied text to clipboard ({len(text)} chars, {text.count(chr(10))} line breaks)")
+
+        # Paste using Ctrl+V (Cmd+V on Mac) - same as manual paste
+        input_box.send_keys(_PASTE_MODIFIER, 'v')
 
-            # Send the message with Enter
+    def _send_text(self, message: str) -> bool:
+        """Send text message with proper line break handling"""
+        try:
+            # Focus the input box
+            input_box = self._focus_input_box()
+
+            self._insert_text(input_box, message)
+
+            # Verify content arrived (waits until the text lands)
+            self._wait_for_js(_INPUT_TEXT_LENGTH_JS, input_box, timeout=2, poll=0.05)
+            content_len = self.driver.execute_script(_INPUT_TEXT_LENGTH_JS, input_box)
+            print(f"✓ Content in input box: {content_len} chars")
+
+            # Send the message with Enter; the send wait only accepts a bubble
+            # added after this point
+            self._ensure_page_helpers()
+            self.driver.execute_script("window.__wtspMarkSendStart();")
             input_box.send_keys(Keys.RETURN)
-            time.sleep(1)
 
             return True
 
@@ -724,10 +1656,39 @@ Keep responses concise and helpful."""
             return False
         except Exception as e:
             print(f"⚠️  Error sending text: {e}")
-            import traceback
             traceback.print_exc()
             return False
 
+    def _ensure_page_helpers(self):
+        """Define the window.__wtsp* helpers unless they are injected on every page load"""
+        if not self._page_helpers_registered:
+            self.driver.execute_script(_PAGE_HELPERS_JS)
+
+    def _prepare_window(self):
+        """
+        Maximize and focus the browser window
+
+        Only needed once per session - the window stays maximized afterwards.
+        Callers reset _window_prepared after a failure that may mean the window
+        was minimized or lost.
+        """
+        if self._window_prepared:
+            return
+        print("🔍 Ensuring browser window is visible and focused...")
+        try:
+            # Maximize window (brings it to front)
+            self.driver.maximize_window()
+
+            # Bring window to front using JavaScript (platform-independent)
+            self.driver.execute_script("window.focus();")
+
+            self._window_prepared = True
+            time.sleep(0.3)  # Brief pause for window manager
+            print("✅ Window focused and ready")
+        except Exception as focus_err:
+            print(f"⚠️  Could not focus window: {focus_err}")
+            print("   File upload and message detection may fail if browser is minimized")
+
     def _send_media(self, media_path: str, caption: str = "") -> bool:
         """Send media (image/video) with optional caption using drag-and-drop for video preview"""
         try:
@@ -735,29 +1696,16 @@ Keep responses concise and helpful."""
 
             # CRITICAL: Ensure window is visible and focused
             # File uploads don't work reliably when window is minimized/background
-            print("🔍 Ensuring browser window is visible and focused...")
-            try:
-                # Maximize window (brings it to front)
-                self.driver.maximize_window()
+            self._prepare_window()
 
-                # Switch to WhatsApp tab if not already active
-                self.driver.switch_to.window(self.driver.current_window_handle)
-
-                # Bring window to front using JavaScript (platform-independent)
-                self.driver.execute_script("window.focus();")
-
-                time.sleep(0.5)  # Brief pause for window manager
-                print("✅ Window focused and ready")
-            except Exception as focus_err:
-                print(f"⚠️  Could not focus window: {focus_err}")
-                print("   File upload may fail if browser is minimized")
+            self._ensure_page_helpers()
 
             # Get absolute path
             abs_path = str(Path(media_path).absolute())
 
-            # Determine file type
-            file_ext = Path(media_path).suffix.lower()
-            is_video = file_ext in ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.wmv', '.3gp']
+            # Determine file type and size once, up front
+            is_video = Path(media_path).suffix.lower() in _VIDEO_EXTENSIONS
+            file_size_mb = os.path.getsize(abs_path) / (1024 * 1024)
 
             if is_video:
                 print(f"🎬 Sending video with preview")
@@ -769,346 +1717,184 @@ Keep responses concise and helpful."""
             if caption:
                 print(f"📝 Typing caption first (will become media caption)...")
                 try:
-                    import pyperclip
-                    import platform
+                    # Focus input box
+                    input_box = self._focus_input_box()
 
-                    input_box = self.wait.until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "[contenteditable='true'][data-tab='10']"))
-                    )
+                    self._insert_text(input_box, caption)
 
-                    # Focus input box
-                    input_box.click()
-                    time.sleep(0.3)
-
-                    # Use system clipboard to preserve line breaks
-                    pyperclip.copy(caption)
-                    print(f"📋 Caption copied to clipboard ({len(caption)} chars, {caption.count(chr(10))} line breaks)")
-
-                    # Paste with Ctrl+V or Cmd+V
-                    if platform.system() == 'Darwin':  # macOS
-                        input_box.send_keys(Keys.COMMAND, 'v')
-                    else:  # Windows/Linux
-                        input_box.send_keys(Keys.CONTROL, 'v')
-
-                    print(f"✅ Caption pasted in chat input: {caption[:50]}...")
-                    time.sleep(1)
-
-                    # Verify caption was pasted
-                    caption_check = self.driver.execute_script(
-                        """
-                        const el = arguments[0];
-                        return el.textContent || el.innerText || '';
-                        """,
-                        input_box
-                    )
-                    print(f"✓ Caption in input box: {len(caption_check)} chars")
+                    print(f"✅ Caption entered in chat input: {caption[:50]}...")
+
+                    # Verify caption arrived
+                    self._wait_for_js(_INPUT_TEXT_LENGTH_JS, input_box, timeout=2, poll=0.05)
+                    caption_len = self.driver.execute_script(_INPUT_TEXT_LENGTH_JS, input_box)
+                    print(f"✓ Caption in input box: {caption_len} chars")
 
                 except Exception as e:
-                    print(f"⚠️  Could not paste caption: {e}")
-                    import traceback
+                    print(f"⚠️  Could not enter caption: {e}")
                     traceback.print_exc()
 
             # STEP 2: Click attachment button - try multiple selectors
+            # Lookup and click happen in one round-trip; the clicked node is
+            # kept on window.__wtsp so later steps can reuse it
             print("📎 Opening attachment menu...")
 
-            attach_selectors = [
-                "[data-icon='plus']",  # Plus icon (new WhatsApp UI)
-                "[data-icon='clip']",  # Clip icon
-                "[aria-label='Attach']",  # Aria label
-                "span[data-icon='plus']",
-                "span[data-icon='clip']",
-                "button[aria-label='Attach']",
-            ]
-
-            attach_btn = None
-            for selector in attach_selectors:
-                try:
-                    attach_btn = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    if attach_btn and attach_btn.is_displayed():
-                        attach_btn.click()
-                        print(f"✅ Opened attachment menu (selector: {selector})")
-                        break
-                except:
-                    continue
+            attach_clicked = self.driver.execute_script("""
+                const selectors = [arguments[0]];
 
-            if not attach_btn:
-                # Try JavaScript fallback
-                clicked = self.driver.execute_script("""
-                    const selectors = [
-                        '[data-icon="plus"]',
-                        '[data-icon="clip"]',
-                        '[aria-label*="Attach"]',
-                        'button[aria-label*="Attach"]'
-                    ];
-                    for (const sel of selectors) {
-                        const btn = document.querySelector(sel);
-                        if (btn) {
-                            btn.click();
-                            return true;
-                        }
-                    }
-                    return false;
-                """)
+                // A visible match first, then any match
+                const btn = window.__wtspFind('attach', selectors, true) ||
+                            window.__wtspFind('attach', selectors, false);
+                if (btn) {
+                    btn.click();
+                    return true;
+                }
+                return false;
+            """, _ATTACH_SELECTOR)
 
-                if clicked:
-                    print("✅ Opened attachment menu (via JavaScript)")
-                else:
-                    raise Exception("Could not find attachment button")
+            if attach_clicked:
+                print("✅ Opened attachment menu")
+            else:
+                raise Exception("Could not find attachment button")
 
-            time.sleep(1.5)
+            # Wait for the menu (or its file input) to render instead of a fixed pause
+            self._wait_for_js(
+                _EXISTS_JS,
+                _MEDIA_ITEM_SELECTOR + ", input[type='file']",
+                timeout=5
+            )
 
             # Now find and click "Photos & Videos" for video preview
             if is_video:
                 print("🎥 Selecting 'Photos & Videos' option...")
 
-                # Give menu time to fully render
-                time.sleep(1)
-
-                # Method 1: Try multiple icon selectors
-                photos_clicked = False
-                icon_selectors = [
-                    "[data-icon='media-filled-refreshed']",
-                    "[data-icon='image']",
-                    "[data-icon='gallery']",
-                    "span[data-icon='image']",
-                    "span[data-icon='gallery']",
-                ]
-
-                for selector in icon_selectors:
-                    try:
-                        media_btn = self.driver.find_element(By.CSS_SELECTOR, selector)
-                        if media_btn and media_btn.is_displayed():
-                            media_btn.click()
-                            print(f"✅ Clicked 'Photos & Videos' ({selector})")
-                            photos_clicked = True
-                            time.sleep(1.5)
-                            break
-                    except:
-                        continue
-
-                # Method 2: JavaScript with more comprehensive search
-                if not photos_clicked:
-                    photos_clicked = self.driver.execute_script("""
-                        // Try icon selectors
-                        const iconSelectors = [
-                            '[data-icon="media-filled-refreshed"]',
-                            '[data-icon="image"]',
-                            '[data-icon="gallery"]',
-                            'span[data-icon="image"]',
-                            'span[data-icon="gallery"]'
-                        ];
-
-                        for (const sel of iconSelectors) {
-                            const icon = document.querySelector(sel);
-                            if (icon && icon.offsetParent !== null) {
-                                // Find clickable parent
-                                let clickable = icon;
-                                while (clickable && !clickable.onclick && clickable.tagName !== 'BUTTON' && !clickable.getAttribute('role')) {
-                                    clickable = clickable.parentElement;
-                                }
-                                if (clickable) {
-                                    clickable.click();
-                                    return true;
-                                }
+                # Icon lookup, text search and last-resort click in one round-trip
+                photos_clicked = self.driver.execute_script("""
+                    window.__wtsp = window.__wtsp || {};
+                    const icons = document.querySelectorAll(arguments[0]);
+
+                    for (const icon of icons) {
+                        if (icon.offsetParent !== null) {
+                            // Find clickable parent
+                            let clickable = icon;
+                            while (clickable && !clickable.onclick && clickable.tagName !== 'BUTTON' && !clickable.getAttribute('role')) {
+                                clickable = clickable.parentElement;
                             }
+                            window.__wtsp.mediaItem = clickable || icon;
+                            window.__wtsp.mediaItem.click();
+                            return 'icon ' + icon.getAttribute('data-icon');
                         }
+                    }
 
-                        // Fallback: Look for menu items with photo/video text
-                        const items = Array.from(document.querySelectorAll('li, div[role="button"], span[role="button"], button'));
-                        for (const item of items) {
-                            const text = (item.textContent || '').toLowerCase();
-                            const label = (item.getAttribute('aria-label') || '').toLowerCase();
-                            const title = (item.getAttribute('title') || '').toLowerCase();
-
-                            if ((text.includes('photo') && text.includes('video')) ||
-                                (label.includes('photo') && label.includes('video')) ||
-                                (title.includes('photo') && title.includes('video')) ||
-                                text.includes('photos & videos') ||
-                                label.includes('photos & videos') ||
-                                text.includes('images') ||
-                                label.includes('images')) {
-                                item.click();
-                                return true;
-                            }
+                    // Fallback: Look for menu items with photo/video text
+                    // Tag lookups return live collections without selector parsing;
+                    // only role="button" elements need a selector query
+                    // Attributes are checked first; textContent (a subtree walk)
+                    // is only built and lowercased when they don't match.
+                    // "photos & videos" is covered by the photo + video check.
+                    const isPhotosVideos = (s) => s.includes('photo') && s.includes('video');
+                    const isPhotosItem = (item) => {
+                        const label = (item.getAttribute('aria-label') || '').toLowerCase();
+                        if (isPhotosVideos(label) || label.includes('images')) {
+                            return true;
                         }
-
-                        // Last resort: click first menu item (usually Photos & Videos)
-                        const firstItem = document.querySelector('ul li:first-child, div[role="button"]:first-of-type');
-                        if (firstItem) {
-                            firstItem.click();
+                        const title = item.getAttribute('title');
+                        if (title && isPhotosVideos(title.toLowerCase())) {
                             return true;
                         }
+                        const text = (item.textContent || '').toLowerCase();
+                        return isPhotosVideos(text) || text.includes('images');
+                    };
+                    const collections = [
+                        document.getElementsByTagName('li'),
+                        document.getElementsByTagName('button'),
+                        document.querySelectorAll('[role="button"]')
+                    ];
+                    for (const items of collections) {
+                        for (let i = 0; i < items.length; i++) {
+                            const item = items[i];
+                            if (isPhotosItem(item)) {
+                                window.__wtsp.mediaItem = item;
+                                item.click();
+                                return 'menu text';
+                            }
+                        }
+                    }
 
-                        return false;
-                    """)
+                    // Last resort: click first menu item (usually Photos & Videos)
+                    const firstItem = document.querySelector('ul li:first-child, div[role="button"]:first-of-type');
+                    if (firstItem) {
+                        window.__wtsp.mediaItem = firstItem;
+                        firstItem.click();
+                        return 'first menu item';
+                    }
 
-                    if photos_clicked:
-                        print("✅ Clicked 'Photos & Videos' (via JavaScript)")
-                        time.sleep(2.5)  # Increased wait for file input to be created
+                    return null;
+                """, _MEDIA_ITEM_SELECTOR)
 
-                if not photos_clicked:
+                if photos_clicked:
+                    print(f"✅ Clicked 'Photos & Videos' ({photos_clicked})")
+                else:
                     print("⚠️  Could not find 'Photos & Videos' button, trying direct file input")
                     print("💡  This may cause video upload to fail")
 
-            # Find file input - IMPORTANT: Wait longer for Finder to open and file input to be ready
+            # Find file input. Selenium drives the <input type="file"> directly, so
+            # we only need it mounted - resolved the moment it is inserted (max 5s)
             print("📂 Looking for file input...")
-            time.sleep(3)  # Increased wait for file picker to fully load
+            self._wait_for_selector("input[type='file']", timeout=5)
 
             # Try to find the file input (it appears after clicking attach or Photos & Videos)
             # For videos, we want the file input that accepts video files
-            if is_video:
-                # For videos, be more strict - only use video or general file inputs
-                file_input_selectors = [
-                    "input[type='file'][accept*='video']",  # Video input preferred
-                    "input[type='file']:not([accept*='image'])",  # General file input (not image-only)
-                    "input[type='file']"  # Last resort: any file input
-                ]
-            else:
-                # For images, image or general inputs are fine
-                file_input_selectors = [
-                    "input[type='file'][accept*='image']",
-                    "input[type='file']"
-                ]
-
-            file_input = None
-            found_selector = None
-            for selector in file_input_selectors:
-                try:
-                    inputs = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if inputs:
-                        # Get ALL file inputs and find the one that's most likely to be the right one
-                        for inp in reversed(inputs):  # Check from last to first (newest first)
-                            try:
-                                # Check if input is attached to DOM and not hidden
-                                if inp.is_enabled():
-                                    # Check accept attribute
-                                    accept_attr = inp.get_attribute('accept') or ''
-
-                                    # For videos, MODIFY if it ONLY accepts images
-                                    if is_video and accept_attr and 'video' not in accept_attr and 'image' in accept_attr:
-                                        print(f"   🔧 Found image-only input: {accept_attr}")
-                                        print(f"   🔧 Modifying to accept videos...")
-                                        # Use JavaScript to modify the accept attribute
-                                        self.driver.execute_script(
-                                            "arguments[0].setAttribute('accept', 'image/*,video/*');",
-                                            inp
-                                        )
-                                        accept_attr = inp.get_attribute('accept')
-                                        print(f"   ✅ Modified to: {accept_attr}")
-
-                                    file_input = inp
-                                    found_selector = selector
-                                    print(f"✅ Found file input: {selector}")
-                                    if accept_attr:
-                                        print(f"   Accepts: {accept_attr}")
-                                    break
-                            except Exception as ex:
-                                print(f"   ⚠️  Error: {str(ex)}")
-                                continue
-                        if file_input:
-                            break
-                except:
-                    continue
-
-            if not file_input:
-                # Last resort: wait for any file input to appear and filter properly
-                try:
-                    print("🔄 Waiting for file inputs to load...")
-                    time.sleep(2)  # Give more time for inputs to appear
-
-                    # Get ALL file inputs and find the best match
-                    all_inputs = self.driver.find_elements(By.CSS_SELECTOR, "input[type='file']")
-
-                    if not all_inputs:
-                        raise Exception("No file inputs found")
-
-                    print(f"   Found {len(all_inputs)} file input(s), checking compatibility...")
-
-                    for inp in reversed(all_inputs):  # Check newest first
-                        try:
-                            if not inp.is_enabled():
-                                continue
+            # For videos, be more strict - only use video or general file inputs
+            file_input_selectors = list(_VIDEO_INPUT_SELECTORS if is_video else _IMAGE_INPUT_SELECTORS)
+            picked = self.driver.execute_script(_PICK_FILE_INPUT_JS, file_input_selectors, is_video)
 
-                            accept_attr = inp.get_attribute('accept') or ''
-
-                            # For videos, MODIFY image-only inputs to accept videos
-                            if is_video:
-                                if accept_attr and 'video' not in accept_attr and 'image' in accept_attr:
-                                    print(f"   🔧 Found image-only input: {accept_attr}")
-                                    print(f"   🔧 Modifying to accept videos...")
-                                    # Use JavaScript to modify the accept attribute
-                                    self.driver.execute_script(
-                                        "arguments[0].setAttribute('accept', 'image/*,video/*');",
-                                        inp
-                                    )
-                                    new_accept = inp.get_attribute('accept')
-                                    print(f"   ✅ Modified accept attribute to: {new_accept}")
-                                    file_input = inp
-                                    break
-                                # Accept inputs that explicitly allow video OR have no restrictions
-                                elif not accept_attr or 'video' in accept_attr or ('image' not in accept_attr):
-                                    file_input = inp
-                                    print(f"✅ Found suitable file input - Accepts: {accept_attr or 'any file type'}")
-                                    break
-                            else:
-                                # For images/documents, any input is fine
-                                file_input = inp
-                                print(f"✅ Found file input - Accepts: {accept_attr or 'any file type'}")
-                                break
-                        except Exception as inner_ex:
-                            print(f"   ⚠️  Error checking input: {str(inner_ex)}")
-                            continue
+            if not picked:
+                # Last resort: wait for any file input to appear and pick again
+                print("🔄 Waiting for file inputs to load...")
+                if self._wait_for_selector("input[type='file']", timeout=2):
+                    picked = self.driver.execute_script(_PICK_FILE_INPUT_JS, file_input_selectors, is_video)
 
-                    if not file_input:
-                        raise Exception(f"Could not find suitable file input for {'video' if is_video else 'file'}")
+            if not picked:
+                raise Exception(f"Could not find file input element for {'video' if is_video else 'file'}")
 
-                except Exception as e:
-                    raise Exception(f"Could not find file input element: {str(e)}")
+            file_input = picked['el']
+            if picked['widened']:
+                print(f"   🔧 Modified image-only input ({picked['widened']}) to accept videos")
+            print(f"✅ Found file input - Accepts: {picked['accept'] or 'any file type'}")
 
             # STEP 3: Send file path to input
             # This will close Finder and upload the file with the caption we typed earlier
             print(f"📤 Sending file to WhatsApp...")
             try:
-                file_input.send_keys(abs_path)
+                self._set_input_file(file_input, abs_path)
                 print(f"✅ File path sent to input")
 
-                # Wait for Finder to close and upload to start
+                # Wait for Finder to close and the preview to appear
+                # (resolved by a MutationObserver the moment it is inserted, or after 11s)
                 print("⏳ Waiting for Finder to close and upload to begin...")
-                time.sleep(3)
-
-                # Verify upload started by checking if preview appeared
-                max_attempts = 5
-                preview_found = False
-                for attempt in range(max_attempts):
-                    preview_exists = self.driver.execute_script("""
-                        // Check if media preview/editor is visible
-                        const preview = document.querySelector('[data-animate-media-viewer]') ||
-                                       document.querySelector('[data-testid="media-viewer"]') ||
-                                       document.querySelector('div[role="dialog"]') ||
-                                       document.querySelector('[data-icon="wds-ic-send-filled"]');
-                        return preview !== null;
-                    """)
-
-                    if preview_exists:
-                        print(f"✅ Upload started, preview visible")
-                        preview_found = True
-                        break
-                    else:
-                        if attempt < max_attempts - 1:
-                            print(f"   Waiting for preview... (attempt {attempt + 1}/{max_attempts})")
-                            time.sleep(2)
+                preview_found = self._wait_for_selector(
+                    '[data-animate-media-viewer], [data-testid="media-viewer"], '
+                    'div[role="dialog"], [data-icon="wds-ic-send-filled"]',
+                    timeout=11
+                )
 
-                if not preview_found:
+                if preview_found:
+                    print(f"✅ Upload started, preview visible")
+                else:
                     print(f"⚠️  Could not verify upload preview, but continuing...")
 
             except Exception as e:
                 print(f"⚠️  Error sending file path: {e}")
                 raise
 
-            # STEP 4: Wait for upload to complete
+            # STEP 4: Wait for upload to be ready (send button shows in the preview)
             # Caption should already be there from Step 1
             print("⏳ Waiting for video to finish uploading...")
-            time.sleep(4)
+            self._wait_for_js(
+                "return !!window.__wtspFind('sendBtn', arguments[0], true);",
+                _SEND_SELECTORS,
+                timeout=10
+            )
 
             # STEP 5: Click send button - try multiple methods
             print("📤 Looking for send button...")
@@ -1116,56 +1902,30 @@ Keep responses concise and helpful."""
             send_success = False
 
             # Method 1: Try multiple send button selectors
-            send_selectors = [
-                "[data-icon='wds-ic-send-filled']",  # New WhatsApp UI
-                "[data-icon='send']",  # Older UI
-                "span[data-icon='wds-ic-send-filled']",
-                "span[data-icon='send']",
-                "[aria-label='Send']",
-                "button[aria-label='Send']",
-                "[data-testid='send']",
-            ]
-
-            for selector in send_selectors:
-                try:
-                    send_btn = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    if send_btn and send_btn.is_displayed():
-                        send_btn.click()
-                        print(f"✅ Send button clicked (selector: {selector})")
-                        send_success = True
-                        break
-                except:
-                    continue
-
-            # Method 2: JavaScript fallback
-            if not send_success:
-                print("⚠️  Direct click failed, trying JavaScript...")
-                send_success = self.driver.execute_script("""
-                    const selectors = [
-                        '[data-icon="wds-ic-send-filled"]',  // New WhatsApp UI
-                        '[data-icon="send"]',
-                        '[aria-label="Send"]',
-                        '[data-testid="send"]'
-                    ];
-
-                    for (const sel of selectors) {
-                        const btn = document.querySelector(sel);
-                        if (btn && btn.offsetParent !== null) {
-                            btn.click();
-                            return true;
-                        }
-                    }
-                    return false;
-                """)
+            # One lookup for all selectors, memoized page-side for retries. The
+            # chat's last message is noted too, so the send wait below only
+            # accepts the bubble this send adds.
+            send_btn = self.driver.execute_script(
+                "window.__wtspMarkSendStart(); return window.__wtspFind('sendBtn', arguments[0], true);",
+                _SEND_SELECTORS
+            )
 
-                if send_success:
+            if send_btn:
+                try:
+                    send_btn.click()
+                    print("✅ Send button clicked")
+                    send_success = True
+                except Exception:
+                    # Method 2: JavaScript click on the same element
+                    print("⚠️  Direct click failed, trying JavaScript...")
+                    self.driver.execute_script("arguments[0].click();", send_btn)
                     print("✅ Send button clicked (via JavaScript)")
+                    send_success = True
 
             # Method 3: Press Enter as last resort
             if not send_success:
                 print("⚠️  Send button not found, trying Enter key...")
-                from selenium.webdriver.common.action_chains import ActionChains
-                ActionChains(self.driver).send_keys(Keys.RETURN).perform()
+                self._press_return()
                 print("✅ Pressed Enter key to send")
                 send_success = True
 
@@ -1175,86 +1935,139 @@ Keep responses concise and helpful."""
             # Wait for upload to complete and message to appear in chat
             print("⏳ Waiting for upload to complete and message to appear...")
 
-            # For videos, wait longer based on file size
+            # For videos, allow longer based on file size. The wait ends as soon as
+            # the message shows its check icon, so fast uploads don't pay for it.
             if is_video:
-                file_size_mb = os.path.getsize(abs_path) / (1024 * 1024)
-                if file_size_mb > 50:
-                    wait_time = 15
-                elif file_size_mb > 20:
-                    wait_time = 10
-                else:
-                    wait_time = 7
-                print(f"   Video size: {file_size_mb:.1f}MB, waiting {wait_time}s for upload...")
-                time.sleep(wait_time)
+                wait_time = next(
+                    (wait for min_mb, wait in _VIDEO_UPLOAD_WAITS if file_size_mb > min_mb),
+                    _VIDEO_UPLOAD_WAITS[-1][1]
+                )
+                print(f"   Video size: {file_size_mb:.1f}MB, waiting up to {wait_time}s for upload...")
             else:
-                time.sleep(5)
-
-            # Check if message was sent by looking for the LAST message container
-            sent_verified = self.driver.execute_script("""
-                // Get all message containers
-                const messages = document.querySelectorAll('[data-testid="msg-container"]');
-                if (messages.length === 0) {
-                    return false;
-                }
+                wait_time = 10
+
+            sent_state = self.driver.execute_async_script(
+                "window.__wtspWaitForSent(arguments[0], arguments[arguments.length - 1]);",
+                wait_time * 1000
+            )
 
-                // Get the last message (most recent)
-                const lastMessage = messages[messages.length - 1];
+            if sent_state == 'sent':
+                print("✅ Media sent successfully (verified - new message has status)")
+            elif sent_state == 'pending':
+                print("✅ Media sent (message queued, upload still in progress)")
+            else:
+                print("⚠️  Could not verify send within timeout")
+                print("💡 Media was likely sent but upload is still in progress")
+                print("✓  Check WhatsApp to confirm delivery")
+                # Return True anyway - video was clicked to send, just taking time to upload
+                # Better to assume success than send duplicate text
 
-                // Check if it's an outgoing message (has 'message-out' class)
-                const isOutgoing = lastMessage.querySelector('[class*="message-out"]') !== null;
+            return True
 
-                if (!isOutgoing) {
-                    return false;
-                }
+        except Exception as e:
+            print(f"⚠️  Error sending media: {e}")
+            # Window may have been minimized or lost - prepare it again next time
+            self._window_prepared = False
+            traceback.print_exc()
+            return False
 
-                // Check for checkmarks (pending, sent, or delivered)
-                const hasCheck = lastMessage.querySelector('[data-icon="msg-check"]') !== null;
-                const hasDblCheck = lastMessage.querySelector('[data-icon="msg-dblcheck"]') !== null;
-                const hasClock = lastMessage.querySelector('[data-icon="msg-time"]') !== null;  // Pending
+    def _set_input_file(self, file_input, path: str):
+        """
+        Attach a file to the picked file input
 
-                return hasCheck || hasDblCheck || hasClock;
-            """)
+        Uses CDP DOM.setFileInputFiles on window.__wtsp.fileInput, a direct
+        browser call, and falls back to WebDriver's send_keys().
 
-            if sent_verified:
-                print("✅ Media sent successfully (verified - last message has status)")
-            else:
-                # Try one more time after additional wait (especially for large videos)
-                retry_wait = 10 if is_video else 5
-                print(f"⚠️  First verification failed, waiting {retry_wait}s longer for upload...")
-                time.sleep(retry_wait)
+        Args:
+            file_input: The file input WebElement (used for the fallback)
+            path: Absolute path of the file to attach
+        """
+        try:
+            result = self.driver.execute_cdp_cmd('Runtime.evaluate', {
+                'expression': 'window.__wtsp && window.__wtsp.fileInput'
+            })
+            object_id = result.get('result', {}).get('objectId')
+            if object_id:
+                try:
+                    self.driver.execute_cdp_cmd('DOM.setFileInputFiles', {
+                        'files': [path], 'objectId': object_id
+                    })
+                    return
+                finally:
+                    # Remote object references live until released - don't leave
+                    # one behind in the page for every media send. A failed
+                    # release must not turn a done upload into a send_keys retry.
+                    try:
+                        self.driver.execute_cdp_cmd('Runtime.releaseObject', {'objectId': object_id})
+                    except Exception:
+                        pass
+        except Exception as e:
+            print(f"   ⚠️  CDP file upload unavailable ({e}), using send_keys")
+        file_input.send_keys(path)
 
-                sent_verified_retry = self.driver.execute_script("""
-                    const messages = document.querySelectorAll('[data-testid="msg-container"]');
-                    if (messages.length === 0) return false;
+    def _wait_for_js(self, script: str, *args, timeout: float = 5, poll: float = 0.1) -> bool:
+        """
+        Poll a JavaScript predicate until it returns a truthy value
 
-                    const lastMessage = messages[messages.length - 1];
-                    const isOutgoing = lastMessage.querySelector('[class*="message-out"]') !== null;
-                    if (!isOutgoing) return false;
+        Args:
+            script: JavaScript returning a truthy value once the condition holds
+            *args: Arguments passed to the script
+            timeout: Maximum seconds to wait
+            poll: Seconds between checks
 
-                    const hasCheck = lastMessage.querySelector('[data-icon="msg-check"]') !== null;
-                    const hasDblCheck = lastMessage.querySelector('[data-icon="msg-dblcheck"]') !== null;
-                    const hasClock = lastMessage.querySelector('[data-icon="msg-time"]') !== null;
+        Returns:
+            True if the condition was met, False on timeout
+        """
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=poll).until(
+                lambda d: d.execute_script(script, *args)
+            )
+            return True
+        except TimeoutException:
+            return False
 
-                    return hasCheck || hasDblCheck || hasClock;
-                """)
+    def _wait_for_selector(self, selector: str, timeout: float = 5) -> bool:
+        """
+        Wait for an element to appear using the page-side MutationObserver helper
 
-                if sent_verified_retry:
-                    print("✅ Media sent successfully (verified after retry)")
-                    return True
-                else:
-                    print("⚠️  Could not verify send within timeout")
-                    print("💡 Media was likely sent but upload is still in progress")
-                    print("✓  Check WhatsApp to confirm delivery")
-                    # Return True anyway - video was clicked to send, just taking time to upload
-                    # Better to assume success than send duplicate text
-                    return True
+        Args:
+            selector: CSS selector to wait for
+            timeout: Maximum seconds to wait
 
-            return True
+        Returns:
+            True if a matching element appeared, False on timeout
+        """
+        return bool(self.driver.execute_async_script(
+            "window.__wtspWaitFor(arguments[0], arguments[1], arguments[arguments.length - 1]);",
+            selector, int(timeout * 1000)
+        ))
 
-        except Exception as e:
-            print(f"⚠️  Error sending media: {e}")
-            import traceback
-            traceback.print_exc()
+    def _wait_for_messages_stable(self, timeout: float = 5, poll: float = 0.1) -> bool:
+        """
+        Wait until the open chat has rendered messages and their count stops changing
+
+        Args:
+            timeout: Maximum seconds to wait
+            poll: Seconds between samples
+
+        Returns:
+            True if two consecutive samples matched, False on timeout
+        """
+        last_count = -1
+
+        def stable(driver):
+            nonlocal last_count
+            count = driver.execute_script(
+                "return document.querySelectorAll('[data-testid=\"msg-container\"]').length;"
+            )
+            settled = count > 0 and count == last_count
+            last_count = count
+            return settled
+
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=poll).until(stable)
+            return True
+        except TimeoutException:
             return False
 
     def get_new_messages(self, phone: str) -> Optional[str]:
@@ -1269,246 +2082,140 @@ Keep responses concise and helpful."""
         """
         try:
             phone = self._format_phone(phone)
-            print(f"🔍 Checking messages from {phone}...")
+            verbose = self.verbose_monitoring
+            if verbose:
+                print(f"🔍 Checking messages from {phone}...")
 
             # Ensure window is visible (message detection can fail when minimized)
-            try:
-                self.driver.maximize_window()
-                self.driver.execute_script("window.focus();")
-            except:
-                pass  # Not critical for message checking
-
-            # Open chat
-            url = f"https://web.whatsapp.com/send?phone={phone.replace('+', '')}"
-            self.driver.get(url)
-            time.sleep(5)  # Increased wait time for chat to load
-
-            # Check if chat loaded successfully - try multiple selectors
-            chat_loaded = False
-            chat_selectors = [
-                "[data-testid='conversation-panel-body']",
-                "[data-testid='conversation-panel-messages']",
-                "div[class*='_ak'][role='application']",  # Main WhatsApp panel
-                "[contenteditable='true'][data-tab='10']",  # Message input box
-            ]
-
-            print("⏳ Waiting for chat to load...")
-            for selector in chat_selectors:
-                try:
-                    element = WebDriverWait(self.driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    if element:
-                        print(f"✅ Chat loaded (found: {selector})")
-                        chat_loaded = True
-                        break
-                except TimeoutException:
-                    continue
-
-            if not chat_loaded:
-                # Last resort: check with JavaScript
-                print("🔄 Trying JavaScript check...")
-                chat_loaded = self.driver.execute_script("""
-                    // Check if we're in a chat conversation
-                    const hasMessages = document.querySelector('[data-testid="msg-container"]') !== null;
-                    const hasInputBox = document.querySelector('[contenteditable="true"][data-tab="10"]') !== null;
-                    const hasConversation = document.querySelector('[role="application"]') !== null;
-                    return hasMessages || hasInputBox || hasConversation;
-                """)
+            self._prepare_window()
+
+            # Open chat - WhatsApp Web renders incoming messages live, so a chat
+            # that is already open doesn't need a page reload
+            self._open_chat(phone, reuse=True)
+
+            # Check if chat loaded successfully - all candidate selectors are
+            # tested in one query per poll instead of one wait per selector
+            if verbose:
+                print("⏳ Waiting for chat to load...")
+            chat_loaded = self._wait_for_js(
+                _EXISTS_JS,
+                _CHAT_LOADED_SELECTOR,
+                timeout=10,
+                poll=0.05
+            )
+            if chat_loaded and verbose:
+                print("✅ Chat loaded")
 
             if not chat_loaded:
+                self._current_open_phone = None
                 print(f"⚠️  Could not load chat for {phone} - chat interface not detected")
                 print("💡 Tip: Make sure the chat exists and WhatsApp Web is properly loaded")
                 return None
 
-            # Scroll to ensure all recent messages are loaded
-            print("📜 Scrolling to load recent messages...")
-            try:
-                self.driver.execute_script("""
-                    // Find the message container and scroll to bottom
-                    const msgContainer = document.querySelector('[data-testid="conversation-panel-body"]') ||
-                                        document.querySelector('[data-testid="conversation-panel-messages"]');
-                    if (msgContainer) {
-                        msgContainer.scrollTop = msgContainer.scrollHeight;
-                        console.log('Scrolled to bottom of messages');
-                    } else {
-                        console.log('Could not find message container to scroll');
-                    }
-                """)
-                time.sleep(2)  # Increased: Wait for messages to render after scroll
-            except Exception as scroll_err:
-                print(f"⚠️  Could not scroll: {scroll_err}")
+            # A page load not scanned yet (just opened here, or by send_message)
+            # needs scrolling and rendering; one already scanned is at the bottom
+            # with its messages rendered
+            if not self._current_chat_scanned:
+                # Scroll to ensure all recent messages are loaded
+                if verbose:
+                    print("📜 Scrolling to load recent messages...")
+                try:
+                    self.driver.execute_script("""
+                        // Find the message container and scroll to bottom
+                        const msgContainer = document.querySelector('[data-testid="conversation-panel-body"]') ||
+                                            document.querySelector('[data-testid="conversation-panel-messages"]');
+                        if (msgContainer) {
+                            msgContainer.scrollTop = msgContainer.scrollHeight;
+                            console.log('Scrolled to bottom of messages');
+                        } else {
+                            console.log('Could not find message container to scroll');
+                        }
+                    """)
+                except Exception as scroll_err:
+                    print(f"⚠️  Could not scroll: {scroll_err}")
 
-            # Give EXTRA time for messages to fully render (critical for minimized window)
-            print("⏳ Waiting for messages to render...")
-            time.sleep(2.5)  # Increased from 1.5s
+                # Wait for messages to render (critical for minimized window)
+                if verbose:
+                    print("⏳ Waiting for messages to render...")
+                self._wait_for_messages_stable()
 
             # Try multiple strategies to find incoming messages
             last_msg = None
-            all_incoming = []
+            js_found_incoming = False
 
             # Strategy 1: Use JavaScript to find incoming messages with timestamps/IDs
             # This is MORE ROBUST - tracks messages by their unique attributes
-            result = self.driver.execute_script(r"""
-                console.log('Starting message detection...');
-
-                // Try multiple selectors for message containers
-                let messageContainers = document.querySelectorAll('[data-testid="msg-container"]');
-                console.log('Method 1 - Found containers with [data-testid="msg-container"]:', messageContainers.length);
-
-                // Fallback: try alternative selectors
-                if (messageContainers.length === 0) {
-                    messageContainers = document.querySelectorAll('div[data-id]');
-                    console.log('Method 2 - Found containers with div[data-id]:', messageContainers.length);
-                }
-
-                // Filter for incoming messages (not sent by us)
-                const incomingMessages = [];
-
-                for (const container of messageContainers) {
-                    // Check if this is an incoming message (has 'message-in' class)
-                    // WhatsApp uses 'message-in' for received messages and 'message-out' for sent
-                    const msgDiv = container.querySelector('[class*="message-in"]');
-
-                    if (msgDiv) {
-                        console.log('Found incoming message element');
-                        // Get the text content - try multiple selectors
-                        let text = null;
-
-                        // Try .selectable-text first
-                        const selectableText = container.querySelector('.selectable-text');
-                        if (selectableText) {
-                            text = selectableText.textContent || selectableText.innerText;
-                        }
-
-                        // Try conversation-text as fallback
-                        if (!text) {
-                            const convText = container.querySelector('[data-testid="conversation-text"]');
-                            if (convText) {
-                                text = convText.textContent || convText.innerText;
-                            }
-                        }
-
-                        // Try any span with text as last resort
-                        if (!text) {
-                            const spans = container.querySelectorAll('span');
-                            for (const span of spans) {
-                                const spanText = span.textContent || span.innerText;
-                                if (spanText && spanText.trim() && spanText.length > 0) {
-                                    text = spanText;
-                                    break;
-                                }
-                            }
-                        }
-
-                        if (text && text.trim()) {
-                            // Get timestamp if available
-                            let timestamp = null;
-                            const timeEl = container.querySelector('[data-testid="msg-meta"]') ||
-                                          container.querySelector('span[class*="timestamp"]') ||
-                                          container.querySelector('div[data-pre-plain-text]');
-                            if (timeEl) {
-                                timestamp = timeEl.textContent || timeEl.getAttribute('data-pre-plain-text');
-                            }
-
-                            // Create unique ID from message content + timestamp
-                            const msgId = container.getAttribute('data-id') ||
-                                         (text.substring(0, 50) + (timestamp || '')).replace(/\s/g, '');
-
-                            incomingMessages.push({
-                                text: text.trim(),
-                                timestamp: timestamp,
-                                id: msgId
-                            });
-                        }
-                    }
-                }
-
-                console.log('Incoming messages found:', incomingMessages.length);
-
-                // Return all incoming messages
-                return {
-                    messages: incomingMessages,
-                    count: incomingMessages.length
-                };
-            """)
+            # Seen IDs go in and only unseen messages come back, so the payload
+            # scales with new traffic rather than with chat history
+            seen_ids = self.seen_message_ids.setdefault(phone, _BoundedIdSet())
+            result = self.driver.execute_script(_FIND_INCOMING_JS, list(seen_ids))
+            # The rendered chat has been read once - later checks may reuse it
+            self._current_chat_scanned = True
 
             if result:
                 messages = result.get('messages', [])
                 msg_count = result.get('count', 0)
-                print(f"📨 JavaScript found {msg_count} incoming messages in chat with {phone}")
-                if msg_count == 0:
+                js_found_incoming = msg_count > 0
+                if verbose:
+                    print(f"📨 JavaScript found {msg_count} incoming messages in chat with {phone}")
+                if msg_count == 0 and verbose:
                     print("⚠️  JavaScript found 0 messages - will try fallback method")
 
-                # Get seen message IDs for this phone
-                if not hasattr(self, 'seen_message_ids'):
-                    self.seen_message_ids = {}
-                if phone not in self.seen_message_ids:
-                    self.seen_message_ids[phone] = set()
-
-                # Find NEW messages (ones we haven't seen before)
+                # Messages come back already filtered against seen IDs
                 new_messages = []
                 for msg in messages:
                     msg_id = msg.get('id', '')
                     msg_text = msg.get('text', '')
-                    if msg_id and msg_id not in self.seen_message_ids[phone]:
+                    if msg_id:
                         new_messages.append(msg)
-                        print(f"  ✨ NEW: {msg_text[:60]}..." if len(msg_text) > 60 else f"  ✨ NEW: {msg_text}")
+                        if verbose:
+                            print(f"  ✨ NEW: {msg_text[:60]}..." if len(msg_text) > 60 else f"  ✨ NEW: {msg_text}")
 
                 # If we found new messages, mark them as seen and return the FIRST new one
                 if new_messages:
                     # Mark ALL new messages as seen
                     for msg in new_messages:
-                        self.seen_message_ids[phone].add(msg.get('id', ''))
-
-                    # Keep only last 100 message IDs to avoid memory bloat
-                    if len(self.seen_message_ids[phone]) > 100:
-                        # Convert to list, keep last 100, convert back to set
-                        self.seen_message_ids[phone] = set(list(self.seen_message_ids[phone])[-100:])
+                        seen_ids.add(msg.get('id', ''))
 
                     # Return the FIRST new message (oldest unread)
                     last_msg = new_messages[0].get('text', '')
                     print(f"✨ Returning FIRST new message from {phone}: {last_msg[:100]}...")
-
-                    # Also update the old tracking for backward compatibility
-                    if last_msg:
-                        self.last_messages[phone] = last_msg
                 else:
-                    print(f"ℹ️  All messages already seen")
-                    all_incoming = []  # Clear to trigger fallback
-
-            # Strategy 2: Fallback using Selenium if JavaScript method fails
-            if not last_msg:
-                print("🔄 Trying fallback method...")
-                # Try different selector combinations
-                selector_attempts = [
-                    "[data-testid='msg-container'] [class*='message-in'] .selectable-text",
-                    "[data-testid='msg-container'] [class*='message-in'] [data-testid='conversation-text']",
-                    "div[class*='message-in'] .selectable-text",
-                    "div[class*='message-in'] span.selectable-text",
-                ]
-
-                for selector in selector_attempts:
-                    try:
-                        messages = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        if messages:
-                            last_msg = messages[-1].text.strip()
-                            print(f"✅ Found message with selector: {selector}")
-                            if last_msg:
-                                # Use text-based tracking as fallback
-                                last_seen = self.last_messages.get(phone, "")
-                                if last_msg != last_seen:
-                                    self.last_messages[phone] = last_msg
-                                    print(f"✨ NEW MESSAGE from {phone}: {last_msg[:100]}...")
-                                    return last_msg
-                                else:
-                                    print(f"ℹ️  No new messages (already seen)")
-                                    return None
-                    except Exception as sel_err:
-                        continue
+                    if verbose:
+                        print(f"ℹ️  All messages already seen")
+
+            # Strategy 2: Fallback if the JavaScript method found no incoming
+            # messages at all (selector drift). When it did find some and they
+            # were all seen, that answer is final - the fallback reads the same DOM.
+            if not last_msg and not js_found_incoming:
+                if verbose:
+                    print("🔄 Trying fallback method...")
+                # Text of the last incoming message, fetched in one query over all
+                # candidate selectors; only the string crosses the wire
+                try:
+                    last_msg = (self.driver.execute_script("""
+                        const texts = document.querySelectorAll(arguments[0]);
+                        return texts.length ? texts[texts.length - 1].textContent : null;
+                    """, _INCOMING_TEXT_SELECTOR) or '').strip()
+                except Exception as sel_err:
+                    print(f"⚠️  Fallback lookup failed: {sel_err}")
+                    last_msg = ''
+
+                if last_msg:
+                    # No message ID here - track the text in the same bounded set
+                    text_id = _TEXT_ID_PREFIX + last_msg
+                    if text_id not in seen_ids:
+                        seen_ids.add(text_id)
+                        print(f"✨ NEW MESSAGE from {phone}: {last_msg[:100]}...")
+                        return last_msg
+                    else:
+                        if verbose:
+                            print(f"ℹ️  No new messages (already seen)")
+                        return None
 
             if not last_msg:
-                print(f"ℹ️  No new messages from {phone}")
+                if verbose:
+                    print(f"ℹ️  No new messages from {phone}")
                 return None
 
             # If we got here, last_msg is already set from the ID-based method
@@ -1516,10 +2223,101 @@ Keep responses concise and helpful."""
 
         except Exception as e:
             print(f"⚠️  Error checking messages from {phone}: {e}")
-            import traceback
-            traceback.print_exc()
+            # Window may have been minimized or lost - prepare it again next time
+            self._window_prepared = False
+            # Don't trust the open chat either - reload it on the next check
+            self._current_open_phone = None
+            self._report_traceback(e)
             return None
 
+    def _prompt_history(self, phone: str, limit: int = 10) -> List[Dict]:
+        """
+        Build the conversation context sent to OpenAI for a contact
+
+        The stored history is left untouched (the UI shows it); only the copy
+        for the prompt is trimmed so each call sends fewer tokens:
+        - only the last `limit` messages are included
+        - repeated identical assistant fallbacks are collapsed to one
+
+        Every message renders the same way on every turn (nothing depends on
+        its distance from the end). While the history fits in `limit`,
+        consecutive prompts therefore extend each other and OpenAI's prompt
+        cache can reuse the conversation part too. Once it is longer, the
+        window slides every turn and only the system message stays a stable
+        prefix.
+
+        Args:
+            phone: Formatted phone number
+            limit: Maximum number of history messages
+
+        Returns:
+            List of {"role", "content"} messages, oldest first
+        """
+        history = self.conversations.get(phone, ())
+        # islice skips the older entries without copying the whole deque
+        recent = list(islice(history, max(0, len(history) - limit), None))
+
+        context = []
+        for msg in recent:
+            if (context and msg["role"] == "assistant" and
+                    context[-1]["role"] == "assistant" and context[-1]["content"] == msg["content"]):
+                continue
+            context.append(msg)
+        return context
+
+    def _system_message(self) -> Dict:
+        """The system prompt as an API message, rebuilt only when system_prompt changes"""
+        cached = self._system_message_cache
+        if cached is None or cached["content"] is not self.system_prompt:
+            cached = self._system_message_cache = {"role": "system", "content": self.system_prompt}
+        return cached
+
+    def _stream_chat_completion(self, messages: List[Dict], max_tokens: int, timeout: float,
+                                marker_re: Optional[re.Pattern] = None):
+        """
+        Request a chat completion as a stream and collect it
+
+        Tokens are read as they are generated instead of waiting for the whole
+        body, and finish_reason is taken from the final chunk. If marker_re is
+        given, the text so far is searched for it whenever a chunk closes a
+        bracket, so a marker is known as soon as it has streamed in.
+
+        Args:
+            messages: Chat messages for the API
+            max_tokens: Maximum tokens to generate
+            timeout: Request timeout in seconds
+            marker_re: Optional pattern to watch for while streaming
+
+        Returns:
+            Tuple of (response text, finish_reason, first marker_re match or None)
+        """
+        stream = self.openai_client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            stream=True
+        )
+        parts = []
+        finish_reason = None
+        marker = None
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta and choice.delta.content:
+                    parts.append(choice.delta.content)
+                    if marker_re is not None and marker is None and ']' in choice.delta.content:
+                        marker = marker_re.search(''.join(parts))
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+        finally:
+            # Hand the connection back to the shared pool even if reading failed
+            stream.close()
+        return ''.join(parts), finish_reason, marker
+
     def generate_ai_response(self, message: str, phone: str) -> str:
         """
         Generate AI response using OpenAI
@@ -1531,61 +2329,55 @@ Keep responses concise and helpful."""
         Returns:
             AI-generated response
         """
-        import sys
         print(f"\n🤖 Generating AI response for message from {phone}...", flush=True)
-        sys.stdout.flush()  # Force immediate output
         print(f"   Customer: {message[:100]}..." if len(message) > 100 else f"   Customer: {message}", flush=True)
-        sys.stdout.flush()
 
         if not self.ai_enabled:
             print("⚠️  AI not enabled - using default response", flush=True)
-            sys.stdout.flush()
             return "Thank you for your message. We'll get back to you soon."
 
         try:
-            # Get conversation history
-            history = self.conversations.get(phone, [])
-            print(f"   Using {len(history)} previous messages as context", flush=True)
-            sys.stdout.flush()
+            # Get conversation history, trimmed for the prompt
+            context = self._prompt_history(phone)
+            print(f"   Using {len(context)} previous messages as context", flush=True)
 
-            # Build messages for API
-            messages = [
-                {"role": "system", "content": self.system_prompt}
-            ]
-
-            # Add history (last 10 messages)
-            messages.extend(history[-10:])
-
-            # Add current message
-            messages.append({"role": "user", "content": message})
+            # Build messages for API: system prompt, history, current message.
+            # The system prompt always leads unchanged, so OpenAI's prompt cache
+            # can reuse it across customers
+            messages = [self._system_message(), *context, {"role": "user", "content": message}]
 
             print(f"   Calling OpenAI {self.model}...", flush=True)
-            sys.stdout.flush()
 
             # Call OpenAI API with explicit timeout
             # Increased max_tokens to 800 to prevent message truncation
-            response = self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
+            ai_response, finish_reason, lead_match = self._stream_chat_completion(
+                messages,
                 max_tokens=800,  # Increased from 200 to allow complete responses
-                timeout=30.0  # 30 second timeout
+                timeout=30.0,  # 30 second timeout
+                marker_re=_LEAD_RE
             )
 
             print(f"   ✅ Received response from OpenAI", flush=True)
-            sys.stdout.flush()
 
-            ai_response = response.choices[0].message.content.strip()
+            ai_response = ai_response.strip()
+
+            # Save a confirmed lead right away, before any continuation request,
+            # so a slow or failed continuation can't lose it
+            if lead_match:
+                product_name = lead_match.group(1).strip()
+                print(f"🎯 Lead confirmed! Product: {product_name}", flush=True)
+                self.save_lead(phone, product_name, f"Last message: {message[:100]}")
             
             # Check if response was truncated or appears incomplete
-            finish_reason = response.choices[0].finish_reason
             needs_completion = False
             
             # Detect if response was cut off
-            if finish_reason == "length":
+            if lead_match:
+                # A lead confirmation is a short closing message - never extend it
+                pass
+            elif finish_reason == "length":
                 needs_completion = True
                 print(f"   ⚠️  Response hit token limit, requesting completion...", flush=True)
-                sys.stdout.flush()
             elif ai_response and len(ai_response) > 20:
                 # Detect incomplete responses that don't have finish_reason="length" but are still cut off
                 # Common patterns: ends with single digit, incomplete list item, no proper punctuation
@@ -1623,21 +2415,15 @@ Keep responses concise and helpful."""
                     if ends_with_single_digit or ends_with_incomplete_list:
                         needs_completion = True
                         print(f"   ⚠️  Response appears incomplete (ends with: '{ai_response[-30:]}'), requesting completion...", flush=True)
-                        sys.stdout.flush()
                     # For missing punctuation, only if it's a long response
                     elif ends_without_punctuation and len(ai_response) > 150:
                         # Check if last sentence ending is far back
-                        last_sentence_end = max(
-                            ai_response.rfind('.'),
-                            ai_response.rfind('!'),
-                            ai_response.rfind('?'),
-                            ai_response.rfind(':\n'),
-                        )
+                        # Only the last 100 chars matter, so the scan stops there
+                        last_sentence_end = _last_sentence_end(ai_response, len(ai_response) - 100)
                         # If last sentence end is more than 100 chars back, likely incomplete
                         if last_sentence_end < len(ai_response) - 100:
                             needs_completion = True
                             print(f"   ⚠️  Response appears incomplete (no proper ending), requesting completion...", flush=True)
-                            sys.stdout.flush()
             
             # If response needs completion, request continuation
             if needs_completion:
@@ -1646,98 +2432,63 @@ Keep responses concise and helpful."""
                 continuation_messages.append({"role": "user", "content": "أكمل رسالتك من حيث توقفت. (Complete your message from where you left off.)"})
                 
                 try:
-                    continuation_response = self.openai_client.chat.completions.create(
-                        model=self.model,
-                        messages=continuation_messages,
-                        temperature=0.7,
+                    continuation, _, _ = self._stream_chat_completion(
+                        continuation_messages,
                         max_tokens=400,
                         timeout=20.0
                     )
-                    continuation = continuation_response.choices[0].message.content.strip()
+                    continuation = continuation.strip()
                     # Only append if continuation makes sense (not a duplicate start)
                     if continuation and len(continuation) > 10:
                         ai_response = ai_response + " " + continuation
                         print(f"   ✅ Response completed", flush=True)
-                        sys.stdout.flush()
+
+                        # The marker may have come in the continuation, or been
+                        # split across both parts - look in the combined text
+                        lead_match = _LEAD_RE.search(ai_response)
+                        if lead_match:
+                            product_name = lead_match.group(1).strip()
+                            print(f"🎯 Lead confirmed! Product: {product_name}", flush=True)
+                            self.save_lead(phone, product_name, f"Last message: {message[:100]}")
                 except Exception as e:
                     print(f"   ⚠️  Could not complete response: {e}", flush=True)
-                    sys.stdout.flush()
                     # If we can't complete, clean up the incomplete ending
                     if ai_response:
                         # Remove incomplete sentences at the end
-                        last_period = ai_response.rfind('.')
-                        last_exclamation = ai_response.rfind('!')
-                        last_question = ai_response.rfind('?')
-                        last_colon = ai_response.rfind(':\n')  # For list items
-                        last_complete = max(last_period, last_exclamation, last_question, last_colon)
+                        # Scan only the last 30% - an earlier ending is never used
+                        last_complete = _last_sentence_end(ai_response, int(len(ai_response) * 0.7))
                         
                         # Only trim if we can keep at least 70% of the message
                         if last_complete > len(ai_response) * 0.7:
                             ai_response = ai_response[:last_complete + 1].strip()
                             print(f"   ⚠️  Trimmed incomplete ending from response", flush=True)
-                            sys.stdout.flush()
                         # If message ends with a single digit or incomplete pattern, try to remove it
                         elif ai_response[-1].isdigit() and len(ai_response) > 20:
                             # Find last proper sentence ending before the digit
                             before_digit = ai_response[:-1].rstrip()
-                            last_proper_end = max(
-                                before_digit.rfind('.'),
-                                before_digit.rfind('!'),
-                                before_digit.rfind('?'),
-                                before_digit.rfind(':')
+                            last_proper_end = _last_sentence_end(
+                                before_digit, int(len(before_digit) * 0.6), ('.', '!', '?', ':')
                             )
                             if last_proper_end > len(before_digit) * 0.6:
                                 ai_response = before_digit[:last_proper_end + 1].strip()
                                 print(f"   ⚠️  Removed incomplete ending pattern", flush=True)
-                                sys.stdout.flush()
             
             print(f"✅ AI Response generated: {ai_response[:100]}..." if len(ai_response) > 100 else f"✅ AI Response: {ai_response}", flush=True)
-            sys.stdout.flush()
-
-            # Check for lead confirmation marker
-            lead_confirmed = False
-            product_name = ""
-            clean_response = ai_response
-
-            # Look for [LEAD_CONFIRMED: product_name] pattern
-            lead_pattern = r'\[LEAD_CONFIRMED:\s*([^\]]+)\]'
-            match = re.search(lead_pattern, ai_response)
-
-            if match:
-                lead_confirmed = True
-                product_name = match.group(1).strip()
-                # Remove the marker from the response
-                clean_response = re.sub(lead_pattern, '', ai_response).strip()
-                print(f"🎯 Lead confirmed! Product: {product_name}", flush=True)
-                sys.stdout.flush()
-
-                # Create conversation summary
-                conversation_summary = f"Last message: {message[:100]}"
 
-                # Save the lead
-                self.save_lead(phone, product_name, conversation_summary)
+            # Remove every [LEAD_CONFIRMED: product_name] marker (the lead was saved above)
+            clean_response = _LEAD_RE.sub('', ai_response).strip()
 
             # Update conversation history (use clean response without marker)
-            if phone not in self.conversations:
-                self.conversations[phone] = []
-
+            # The deque keeps only the last `conversation_history_limit` messages
             self.conversations[phone].append({"role": "user", "content": message})
             self.conversations[phone].append({"role": "assistant", "content": clean_response})
 
-            # Keep only last 20 messages
-            if len(self.conversations[phone]) > 20:
-                self.conversations[phone] = self.conversations[phone][-20:]
-
             print(f"   Conversation history updated ({len(self.conversations[phone])} messages)", flush=True)
-            sys.stdout.flush()
             return clean_response
 
         except Exception as e:
             print(f"⚠️  AI response error: {e}", flush=True)
-            sys.stdout.flush()
-            import traceback
             traceback.print_exc()
-            sys.stdout.flush()
             return "Thank you for your message. We'll get back to you soon."
 
     def start_monitoring_contact(self, phone: str):
@@ -1756,18 +2507,10 @@ Keep responses concise and helpful."""
             # This ensures we start fresh from our offer message
             if phone in self.conversations:
                 print(f"   Clearing previous conversation history for {phone}")
-                self.conversations[phone] = []
-            else:
-                # Initialize empty conversation history
-                self.conversations[phone] = []
+            self.conversations[phone] = self._new_history()
 
             # Mark all existing messages as "seen" to avoid responding to old messages
             try:
-                # Open chat
-                url = f"https://web.whatsapp.com/send?phone={phone.replace('+', '')}"
-                self.driver.get(url)
-                time.sleep(3)
-
                 # Use get_new_messages to populate seen_message_ids
                 # This will mark all current messages as "seen"
                 _ = self.get_new_messages(phone)
@@ -1780,33 +2523,131 @@ Keep responses concise and helpful."""
         except Exception as e:
             print(f"⚠️  Error starting monitoring for {phone}: {e}")
 
+    def _report_traceback(self, exc: Exception):
+        """
+        Print the traceback of a monitoring error when verbose_monitoring is on
+
+        A failure that persists (e.g. the browser went away) raises the same error
+        every check; its traceback is printed once and the repeats only counted.
+
+        Args:
+            exc: The exception being handled
+        """
+        if not self.verbose_monitoring:
+            return
+        signature = (type(exc), str(exc))
+        if signature == self._last_error_signature:
+            self._repeated_errors += 1
+            return
+        if self._repeated_errors:
+            print(f"   (previous error repeated {self._repeated_errors} more time(s))")
+        self._last_error_signature = signature
+        self._repeated_errors = 0
+        traceback.print_exc()
+
+    def _submit_ai_response(self, message: str, phone: str):
+        """
+        Start generating an AI response without waiting for it
+
+        Replies for different contacts only wait on OpenAI, so up to
+        _MAX_CONCURRENT_AI_CALLS of them are generated at the same time.
+
+        Args:
+            message: Customer message
+            phone: Customer phone number
+
+        Returns:
+            Future resolving to the AI-generated response
+        """
+        if self._ai_executor is None:
+            self._ai_executor = ThreadPoolExecutor(
+                max_workers=_MAX_CONCURRENT_AI_CALLS,
+                thread_name_prefix="AIResponse"
+            )
+        return self._ai_executor.submit(self.generate_ai_response, message, phone)
+
+    def _scan_chat_activity(self) -> Tuple[Dict[str, bool], Optional[int]]:
+        """
+        Read the chat list and the open chat's incoming-message count in one call
+
+        Returns:
+            Tuple of:
+            - map of phone digits (no +) to True if the chat shows an unread badge,
+              False if it doesn't; empty if the sidebar couldn't be read, or if
+              no badge has been recognized yet this session (it may not work
+              in this UI)
+            - incoming messages added to the open chat's page so far, or None if
+              not known (watcher just installed, page helpers unavailable)
+        """
+        try:
+            self._ensure_page_helpers()
+            activity = self.driver.execute_script(
+                _SIDEBAR_UNREAD_JS, _CHAT_ROW_SELECTOR, _UNREAD_BADGE_SELECTOR
+            ) or {}
+            # Until one badge has been recognized, no badge anywhere can't be
+            # told apart from badges not working in this UI - don't let that
+            # mark every chat as read. Afterwards, no badge just means idle.
+            if activity.get('badges'):
+                self._unread_badges_seen = True
+            unread = (activity.get('unread') or {}) if self._unread_badges_seen else {}
+            return unread, activity.get('incoming')
+        except Exception as e:
+            if self.verbose_monitoring:
+                print(f"⚠️  Could not read chat list: {e}")
+            return {}, None
+
     def _background_monitoring_loop(self):
         """Background thread that continuously monitors contacts for new messages"""
         print("🔄 Background monitoring thread started")
+        cycle = 0
         
         while self.auto_monitoring_active:
             try:
-                # Get list of contacts to monitor (thread-safe)
-                with self.monitoring_lock:
-                    # Only monitor contacts that are not stopped
-                    active_contacts = [
-                        phone for phone in self.monitored_contacts 
-                        if phone not in self.monitoring_stopped_contacts
-                    ]
+                # Get list of contacts to monitor - the stopped set is an immutable
+                # snapshot, so no lock is needed to read it
+                stopped = self.monitoring_stopped_contacts
+                active_contacts = [
+                    phone for phone in self.monitored_contacts 
+                    if phone not in stopped
+                ]
                 
                 if not active_contacts:
                     # No contacts to monitor, wait a bit and check again
-                    time.sleep(self.monitoring_check_interval)
+                    self._stop_event.wait(self.monitoring_check_interval)
                     continue
                 
-                # Check each contact for new messages
+                # One read tells which listed chats have unread messages and
+                # whether the open chat got any incoming message since last cycle
+                sidebar, incoming = self._scan_chat_activity()
+                open_phone = self._current_open_phone
+                full_check = cycle % self.full_check_every_cycles == 0
+                cycle += 1
+
+                # Check each contact for new messages, starting with the chat that
+                # is already open so it is checked without a reload
+                active_contacts.sort(key=lambda p: p != open_phone)
+                replies = []  # (phone, future AI response) for contacts with new messages
                 for phone in active_contacts:
                     if not self.auto_monitoring_active:
                         break
+
+                    # Skip chats the sidebar shows as fully read. The open chat never
+                    # gets an unread badge, and contacts missing from the sidebar
+                    # (saved under a name, scrolled out) are checked as usual.
+                    # A periodic full check skips nothing.
+                    if not full_check:
+                        if phone != open_phone:
+                            if sidebar.get(_format_phone_number(phone)[1:]) is False:
+                                continue
+                        elif incoming is not None and self._incoming_checked == (phone, incoming):
+                            # Open chat, and no incoming bubble was added since it was checked
+                            continue
                     
                     try:
                         # Check for new messages
                         new_msg = self.get_new_messages(phone)
+                        if phone == open_phone:
+                            self._incoming_checked = (phone, incoming)
                         
                         if new_msg:
                             print(f"\n📨 New message from {phone}!")
@@ -1815,31 +2656,39 @@ Keep responses concise and helpful."""
                             # Generate AI response
                             if self.ai_enabled:
                                 print(f"   🤖 Generating AI response...")
-                                ai_response = self.generate_ai_response(new_msg, phone)
-                                
-                                # Send response
-                                print(f"   📤 Sending AI response...")
-                                if self.send_message(phone, ai_response):
-                                    self.ai_responses_sent += 1
-                                    print(f"   ✅ Response sent successfully to {phone}")
-                                else:
-                                    print(f"   ❌ Failed to send response to {phone}")
+                                replies.append((phone, self._submit_ai_response(new_msg, phone)))
                             else:
                                 print(f"   ⚠️  AI not enabled - skipping response")
                     
                     except Exception as e:
                         print(f"   ⚠️  Error checking/responding to {phone}: {e}")
-                        import traceback
-                        traceback.print_exc()
+                        self._report_traceback(e)
+
+                # Send the replies in order; the browser is only driven from this
+                # thread, while the OpenAI calls run side by side
+                for phone, reply in replies:
+                    try:
+                        ai_response = reply.result()
+
+                        # Send response
+                        print(f"   📤 Sending AI response to {phone}...")
+                        if self.send_message(phone, ai_response):
+                            self.ai_responses_sent += 1
+                            print(f"   ✅ Response sent successfully to {phone}")
+                        else:
+                            print(f"   ❌ Failed to send response to {phone}")
+
+                    except Exception as e:
+                        print(f"   ⚠️  Error checking/responding to {phone}: {e}")
+                        self._report_traceback(e)
                 
-                # Wait before next check cycle
-                time.sleep(self.monitoring_check_interval)
+                # Wait before next check cycle (returns at once on stop)
+                self._stop_event.wait(self.monitoring_check_interval)
                 
             except Exception as e:
                 print(f"⚠️  Error in background monitoring loop: {e}")
-                import traceback
-                traceback.print_exc()
-                time.sleep(self.monitoring_check_interval)
+                self._report_traceback(e)
+                self._stop_event.wait(self.monitoring_check_interval)
         
         print("🛑 Background monitoring thread stopped")
 
@@ -1851,6 +2700,7 @@ Keep responses concise and helpful."""
                 return
             
             self.auto_monitoring_active = True
+            self._stop_event.clear()
             
             # Start background monitoring thread
             self.monitoring_thread = threading.Thread(
@@ -1870,6 +2720,8 @@ Keep responses concise and helpful."""
                 return
             
             self.auto_monitoring_active = False
+            # Wakes the loop if it is waiting between cycles
+            self._stop_event.set()
             print("🛑 Stopping auto-monitoring...")
         
         # Wait for thread to finish (with timeout)
@@ -1880,31 +2732,51 @@ Keep responses concise and helpful."""
 
     def stop_monitoring_contact(self, phone: str):
         """Stop monitoring a specific contact"""
-        phone = self._format_phone(phone)
-        with self.monitoring_lock:
-            if phone in self.monitoring_stopped_contacts:
-                print(f"ℹ️  Monitoring already stopped for {phone}")
-                return
-            
-            self.monitoring_stopped_contacts.add(phone)
-            print(f"🛑 Stopped monitoring for {phone}")
+        self.stop_monitoring_contacts([phone])
+
+    def stop_monitoring_contacts(self, phones):
+        """
+        Stop monitoring several contacts in one update
+
+        Args:
+            phones: Iterable of phone numbers
+        """
+        phones = [self._format_phone(phone) for phone in phones]
+        with self._contacts_lock:
+            stopped = self.monitoring_stopped_contacts
+            for phone in phones:
+                if phone in stopped:
+                    print(f"ℹ️  Monitoring already stopped for {phone}")
+                else:
+                    print(f"🛑 Stopped monitoring for {phone}")
+            self.monitoring_stopped_contacts = stopped.union(phones)
 
     def resume_monitoring_contact(self, phone: str):
         """Resume monitoring a specific contact"""
-        phone = self._format_phone(phone)
-        with self.monitoring_lock:
-            if phone not in self.monitoring_stopped_contacts:
-                print(f"ℹ️  Monitoring not stopped for {phone}")
-                return
-            
-            self.monitoring_stopped_contacts.remove(phone)
-            print(f"▶️  Resumed monitoring for {phone}")
+        self.resume_monitoring_contacts([phone])
+
+    def resume_monitoring_contacts(self, phones):
+        """
+        Resume monitoring several contacts in one update
+
+        Args:
+            phones: Iterable of phone numbers
+        """
+        phones = [self._format_phone(phone) for phone in phones]
+        with self._contacts_lock:
+            stopped = self.monitoring_stopped_contacts
+            for phone in phones:
+                if phone in stopped:
+                    print(f"▶️  Resumed monitoring for {phone}")
+                else:
+                    print(f"ℹ️  Monitoring not stopped for {phone}")
+            self.monitoring_stopped_contacts = stopped.difference(phones)
 
     def is_contact_monitoring_stopped(self, phone: str) -> bool:
         """Check if monitoring is stopped for a contact"""
         phone = self._format_phone(phone)
-        with self.monitoring_lock:
-            return phone in self.monitoring_stopped_contacts
+        # Immutable snapshot - only updates need _contacts_lock
+        return phone in self.monitoring_stopped_contacts
 
     def initialize_message_tracking(self, phone: str):
         """
@@ -1916,12 +2788,13 @@ Keep responses concise and helpful."""
         """
         try:
             phone = self._format_phone(phone)
-            print(f"🔄 Initializing message tracking for {phone}...")
+            # Already tracked (e.g. setup re-run from the UI): skip the chat scan,
+            # which would also mark messages that arrived since as seen
+            if self.seen_message_ids.get(phone):
+                print(f"ℹ️  Message tracking already initialized for {phone}")
+                return
 
-            # Open chat
-            url = f"https://web.whatsapp.com/send?phone={phone.replace('+', '')}"
-            self.driver.get(url)
-            time.sleep(5)
+            print(f"🔄 Initializing message tracking for {phone}...")
 
             # Use get_new_messages to populate seen_message_ids without returning anything
             # This will mark all current messages as "seen"
@@ -1959,7 +2832,7 @@ Keep responses concise and helpful."""
             print(f"   Duration: {duration}s")
         print("   Press Ctrl+C to stop\n")
 
-        start_time = time.time()
+        start_time = time.monotonic()
         cycle = 0
 
         try:
@@ -1990,10 +2863,8 @@ Keep responses concise and helpful."""
                     else:
                         print("No new messages")
 
-                    time.sleep(1)
-
                 # Check duration
-                if duration and (time.time() - start_time) >= duration:
+                if duration and (time.monotonic() - start_time) >= duration:
                     print(f"\n⏱️  Duration reached ({duration}s)")
                     break
 
@@ -2007,27 +2878,8 @@ Keep responses concise and helpful."""
     def check_read_receipts(self):
         """Check and update read receipt status for sent messages"""
         try:
-            # Look for all sent message bubbles (outgoing messages)
-            messages = self.driver.find_elements(By.CSS_SELECTOR, "[data-testid='msg-container']")
-
-            delivered_count = 0
-            read_count = 0
-
-            for msg in messages:
-                try:
-                    # Check for read status (blue double check)
-                    read_icons = msg.find_elements(By.CSS_SELECTOR, "[data-icon='msg-dblcheck'][aria-label*='Read']")
-                    if read_icons:
-                        read_count += 1
-                        continue
-
-                    # Check for delivered status (gray double check)
-                    delivered_icons = msg.find_elements(By.CSS_SELECTOR, "[data-icon='msg-dblcheck']")
-                    if delivered_icons:
-                        delivered_count += 1
-
-                except:
-                    continue
+            # Count blue (read) and gray (delivered) double checks in the page
+            read_count, delivered_count = self.driver.execute_script(_READ_RECEIPTS_JS)
 
             # Update stats
             self.messages_read = read_count
@@ -2042,8 +2894,11 @@ Keep responses concise and helpful."""
         total_attempts = self.messages_sent + self.messages_failed
         success_rate = (self.messages_sent / total_attempts) if total_attempts > 0 else 0
 
-        # Update read receipts if browser is active
-        if self.driver:
+        # Update read receipts if browser is active (UI polling reuses recent counts)
+        now = time.monotonic()
+        if self.driver and (self._receipts_checked_at is None or
+                            now - self._receipts_checked_at >= self.read_receipts_ttl):
+            self._receipts_checked_at = now
             try:
                 self.check_read_receipts()
             except:
@@ -2058,7 +2913,10 @@ Keep responses concise and helpful."""
             "ai_responses": self.ai_responses_sent,  # Match streamlit key
             "ai_responses_sent": self.ai_responses_sent,
             "conversations": len(self.conversations),
-            "conversation_history": self.conversations,  # Match streamlit key
+            # Plain lists so callers can slice (e.g. messages[-5:] in streamlit)
+            "conversation_history": {
+                phone: list(history) for phone, history in self.conversations.items()
+            },  # Match streamlit key
             "monitored_contacts": len(self.monitored_contacts)
         }
 
@@ -2077,6 +2935,22 @@ Keep responses concise and helpful."""
             self.driver.quit()
             print("✅ Browser closed")
 
+        if self._ai_executor is not None:
+            self._ai_executor.shutdown(wait=True)
+            self._ai_executor = None
+
+        # Write any lead status updates still waiting for their flush
+        timer = self._leads_flush_timer
+        if timer is not None:
+            timer.cancel()
+        self.flush_leads()
+        with self._leads_lock:
+            self._close_leads_file()
+
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+
 
 if __name__ == "__main__":
     # Quick test